@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from constants import *
+
+# 成就订阅的事件
+COLLECT = "collect"  # 拾取收集品：type, rarity, coins, score
+KILL = "kill"  # 击败敌人：enemy_type
+LEVEL_CLEAR = "level_clear"  # 通过关卡：level, character
+
+ENEMY_NAMES = {
+    EnemyType.LOGGER: '伐木工',
+    EnemyType.POLLUTER: '污染者',
+    EnemyType.MACHINE: '伐木机',
+    EnemyType.FLAMETHROWER: '火焰喷射器',
+}
+
+
+class Achievement:
+    """成就 - 只订阅一种事件，事件满足条件时累加进度"""
+    __slots__ = ("key", "name", "description", "event", "target", "condition", "amount", "distinct", "category",
+                 "progress", "completed", "seen")
+
+    def __init__(self, key, name, description, event, target, condition=None, amount=None, distinct=None,
+                 category="general"):
+        self.key = key
+        self.name = name
+        self.description = description
+        self.event = event
+        self.target = target
+        self.condition = condition  # 事件数据 -> 是否计入，None表示都计入
+        self.amount = amount  # 从事件数据中取累加值的字段名，None表示每次加1
+        self.distinct = distinct  # 不为None时只统计该字段的不同取值（如不同的关卡）
+        self.category = category
+        self.progress = 0
+        self.completed = False
+        self.seen = set()  # distinct字段已经出现过的取值
+
+    def handle(self, data):
+        """处理一次事件，刚刚完成时返回True"""
+        if self.completed:
+            return False
+        if self.condition is not None and not self.condition(data):
+            return False
+        if self.distinct is not None:
+            value = data[self.distinct]
+            if value in self.seen:
+                return False
+            self.seen.add(value)
+            self.progress = len(self.seen)
+        else:
+            self.progress += 1 if self.amount is None else data.get(self.amount, 0)
+        if self.progress >= self.target:
+            self.completed = True
+            return True
+        return False
+
+    def export(self):
+        """存档用的进度，统计不同取值的成就保存取值列表"""
+        if self.distinct is not None:
+            return sorted(self.seen)
+        return self.progress
+
+    def restore(self, value):
+        """从存档恢复进度"""
+        if self.distinct is not None:
+            # 旧存档中的计数无法还原是哪些取值，直接丢弃
+            self.seen = set(value) if isinstance(value, list) else set()
+            self.progress = len(self.seen)
+        else:
+            self.progress = value
+        self.completed = self.progress >= self.target
+
+    def summary(self):
+        return {
+            'name': self.name,
+            'description': self.description,
+            'progress': min(self.target, self.progress),
+            'target': self.target,
+            'completed': self.completed
+        }
+
+
+def default_achievements():
+    """全部成就定义"""
+    achievements = [
+        Achievement('collector', '收集家', '收集100个物品', COLLECT, 100, category="collection"),
+        Achievement('treasure_hunter', '寻宝者', '收集10个稀有物品', COLLECT, 10,
+                    condition=lambda data: data['rarity'].value >= 3, category="collection"),
+        Achievement('wealthy', '富有者', '收集1000金币', COLLECT, 1000, amount='coins', category="collection"),
+        Achievement('merchant_bane', '终结贪婪', '击败贪婪商人', KILL, 1,
+                    condition=lambda data: data['enemy_type'] == EnemyType.BOSS.value, category="combat"),
+    ]
+
+    # 每种敌人的击败数
+    for enemy_type, enemy_name in ENEMY_NAMES.items():
+        achievements.append(Achievement(f'{enemy_type.name.lower()}_slayer', f'{enemy_name}克星',
+                                        f'击败50个{enemy_name}', KILL, 50,
+                                        condition=lambda data, value=enemy_type.value: data['enemy_type'] == value,
+                                        category="combat"))
+
+    # 每一关的通关成就
+    for level in range(1, MAX_LEVELS + 1):
+        achievements.append(Achievement(f'clear_level_{level}', f'第{level}关', f'通过第{level}关', LEVEL_CLEAR, 1,
+                                        condition=lambda data, value=level: data['level'] == value,
+                                        category="level"))
+
+    # 每个角色的通关成就（角色类型用名称比较，避免依赖角色模块）
+    for character_name, display_name in (('LIA', '莉娅'), ('KARN', '卡恩')):
+        achievements.append(Achievement(f'{character_name.lower()}_champion', f'{display_name}的旅程',
+                                        f'使用{display_name}通过全部关卡', LEVEL_CLEAR, MAX_LEVELS,
+                                        condition=lambda data, value=character_name: data['character'].name == value,
+                                        distinct='level', category="character"))
+    return achievements
+
+
+class AchievementTracker:
+    """成就追踪器 - 成就按订阅的事件分组，事件发生时只更新订阅它的成就，查询时直接读取进度"""
+
+    def __init__(self, achievements=None):
+        self.achievements = {}  # 成就键 -> 成就
+        self.subscribers = {}  # 事件 -> 订阅该事件且未完成的成就列表
+        self.newly_completed = []  # 尚未被取走的新完成成就
+        self.completed_total = 0
+        for achievement in (achievements if achievements is not None else default_achievements()):
+            self.add(achievement)
+
+    def add(self, achievement):
+        self.achievements[achievement.key] = achievement
+        if achievement.completed:
+            self.completed_total += 1
+        else:
+            self.subscribers.setdefault(achievement.event, []).append(achievement)
+
+    def emit(self, event, **data):
+        """派发事件，没有订阅者的事件没有开销"""
+        listeners = self.subscribers.get(event)
+        if not listeners:
+            return
+        finished = False
+        for achievement in listeners:
+            if achievement.handle(data):
+                self.newly_completed.append(achievement)
+                self.completed_total += 1
+                finished = True
+        if finished:
+            # 完成的成就不再接收事件
+            self.subscribers[event] = [achievement for achievement in listeners if not achievement.completed]
+
+    def pop_completed(self):
+        """取走上次调用以来新完成的成就"""
+        completed = self.newly_completed
+        self.newly_completed = []
+        return completed
+
+    def get(self, key):
+        return self.achievements[key]
+
+    def get_progress(self, category=None):
+        """成就进度 {成就键: 摘要}，可以只取某一类"""
+        return {key: achievement.summary() for key, achievement in self.achievements.items()
+                if category is None or achievement.category == category}
+
+    def completed_count(self):
+        return self.completed_total
+
+    def export_progress(self):
+        """存档用的进度 {成就键: 进度}"""
+        return {key: achievement.export() for key, achievement in self.achievements.items()}
+
+    def load_progress(self, progress):
+        """从存档恢复进度，已完成的成就不再订阅事件"""
+        for key, value in progress.items():
+            achievement = self.achievements.get(key)
+            if achievement is not None:
+                achievement.restore(value)
+        achievements = list(self.achievements.values())
+        self.achievements = {}
+        self.subscribers = {}
+        self.completed_total = 0
+        for achievement in achievements:
+            self.add(achievement)
+
+
+# 全局成就追踪器，收集品管理器和Game在事件发生时派发
+achievement_tracker = AchievementTracker()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import queue
+import random
+import threading
+from constants import *
+
+# 特殊攻击类型，与GreedyMerchant.execute_special_attack一致
+SHOCKWAVE_ATTACK = 0
+POLLUTION_ATTACK = 1
+FLAME_ATTACK = 2
+MACHINE_ATTACK = 3
+
+
+class BossSnapshot:
+    """BOSS决策所需的世界快照，只包含数值，工作线程不会访问游戏对象"""
+    __slots__ = ("boss_x", "boss_y", "boss_speed", "strength", "phase", "health_ratio",
+                 "minion_count", "max_minions", "player_x", "player_y", "player_health", "world_width")
+
+    def __init__(self, boss, player, world):
+        self.boss_x = boss.rect.centerx
+        self.boss_y = boss.rect.centery
+        self.boss_speed = boss.speed
+        self.strength = boss.strength
+        self.phase = boss.phase
+        self.health_ratio = boss.health / boss.max_health
+        self.minion_count = len([minion for minion in boss.minions if minion.alive and minion.owner is boss])
+        self.max_minions = boss.max_minions
+        self.player_x = player.rect.centerx
+        self.player_y = player.rect.centery
+        self.player_health = player.health
+        self.world_width = world.world_width
+
+
+class BossPlan:
+    """BOSS行动计划：下一次特殊攻击、移动方向和召唤小怪的位置"""
+    __slots__ = ("attack_type", "move_direction", "minion_spawns")
+
+    def __init__(self, attack_type, move_direction, minion_spawns):
+        self.attack_type = attack_type
+        self.move_direction = move_direction
+        self.minion_spawns = minion_spawns  # [(x坐标, 敌人类型)]
+
+
+def expected_attack_damage(attack_type, distance, snapshot):
+    """估算某种特殊攻击在给定距离下的期望伤害"""
+    strength = snapshot.strength
+    if attack_type == SHOCKWAVE_ATTACK:
+        return strength * 0.7 if distance <= 200 else 0
+    if attack_type == POLLUTION_ATTACK:
+        # 污染云会残留一段时间，额外计入持续伤害
+        cloud_ticks = POLLUTION_CLOUD_DURATION // POLLUTION_CLOUD_TICK
+        return strength * 0.5 + strength * 0.1 * cloud_ticks * 0.3 if distance <= 180 else 0
+    if attack_type == FLAME_ATTACK:
+        if distance > 220:
+            return 0
+        return strength * 0.6 * 50 / max(distance, 20)
+    # 机械打击始终瞄准玩家，但准备期间玩家有机会躲开
+    return strength * 0.8 * 0.5
+
+
+def plan_boss(snapshot, rng):
+    """根据快照计算行动计划（在工作线程中执行，随机数只从规划器自己的rng中取）"""
+    # 准备特殊攻击期间BOSS会继续移动，按移动后的距离评估每种攻击
+    travel = snapshot.boss_speed * 60
+    best_score = -1
+    best_attack = rng.randint(0, 3)
+    best_direction = 1 if snapshot.player_x > snapshot.boss_x else -1
+    for direction in (-1, 1):
+        future_x = min(max(snapshot.boss_x + direction * travel, 0), snapshot.world_width)
+        dx = snapshot.player_x - future_x
+        dy = snapshot.player_y - snapshot.boss_y
+        distance = (dx * dx + dy * dy) ** 0.5
+        for attack_type in (SHOCKWAVE_ATTACK, POLLUTION_ATTACK, FLAME_ATTACK, MACHINE_ATTACK):
+            score = expected_attack_damage(attack_type, distance, snapshot)
+            # 第二阶段更倾向于范围攻击
+            if snapshot.phase >= 2 and attack_type in (POLLUTION_ATTACK, MACHINE_ATTACK):
+                score *= 1.2
+            # 加一点随机扰动，避免每次都选同一种攻击
+            score *= rng.uniform(0.85, 1.15)
+            if score > best_score:
+                best_score = score
+                best_attack = attack_type
+                best_direction = direction
+
+    # 小怪分布在玩家两侧包夹，玩家离得远时多召唤远程敌人
+    minion_spawns = []
+    free_slots = max(0, snapshot.max_minions - snapshot.minion_count)
+    far_away = abs(snapshot.player_x - snapshot.boss_x) > 300
+    for index in range(free_slots):
+        side = -1 if index % 2 == 0 else 1
+        x = snapshot.player_x + side * rng.randint(150, 250)
+        x = min(max(x, 100), snapshot.world_width - 100)
+        if far_away:
+            enemy_type = rng.choice((EnemyType.POLLUTER.value, EnemyType.FLAMETHROWER.value))
+        else:
+            enemy_type = rng.choice((EnemyType.LOGGER.value, EnemyType.MACHINE.value))
+        minion_spawns.append((x, enemy_type))
+
+    return BossPlan(best_attack, best_direction, minion_spawns)
+
+
+class AIPlanner:
+    """后台AI规划服务 - 主循环提交快照，工作线程计算计划，固定几帧后主循环取回结果，期间继续执行上一次的计划"""
+
+    def __init__(self, interval=BOSS_PLAN_INTERVAL, seed=None, latency=BOSS_PLAN_LATENCY):
+        self.interval = interval
+        self.latency = latency
+        # 工作线程专用的随机数生成器，不和主循环共用全局random；种子在主线程中取，
+        # 请求按提交顺序处理，同样的全局种子得到同样的计划
+        self.random = random.Random(random.getrandbits(32) if seed is None else seed)
+        self.requests = queue.Queue()
+        self.results = {}  # 请求编号 -> 计划
+        self.pending = set()  # 正在计算的请求编号，每个BOSS同时只有一个请求
+        self.generation = 0  # 切换关卡时加一，旧关卡提交的请求算完后直接丢弃
+        self.next_serial = 0  # 每个BOSS第一次提交时分配的序号
+        self.done = threading.Condition()  # 保护结果和请求编号，工作线程算完一个计划时通知
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def run(self):
+        while True:
+            key, snapshot = self.requests.get()
+            if key is None:
+                break
+            plan = plan_boss(snapshot, self.random)
+            with self.done:
+                if key[0] == self.generation:
+                    self.results[key] = plan
+                    self.pending.discard(key)
+                    self.done.notify_all()
+
+    def reset(self):
+        """切换关卡时丢弃尚未取回的结果，还在计算的请求完成后也不会再交给新关卡的BOSS"""
+        with self.done:
+            self.generation += 1
+            self.results = {}
+            self.pending = set()
+
+    def shutdown(self):
+        """退出游戏时结束工作线程"""
+        self.requests.put((None, None))
+        self.worker.join()
+
+    def update_boss(self, boss, player, world):
+        """在提交后的第latency帧取回计划，并按间隔为BOSS提交新的快照"""
+        with self.done:
+            # 请求编号：(关卡代数, BOSS序号)，不用id(boss)，对象被回收后地址可能被新的BOSS复用
+            key = boss.plan_key
+            if key is None or key[0] != self.generation:
+                self.next_serial += 1
+                key = boss.plan_key = (self.generation, self.next_serial)
+            if key in self.pending:
+                boss.plan_wait -= 1
+                if boss.plan_wait <= 0:
+                    # 到了取回的帧：计划还没算完时等待工作线程，计划生效的帧与线程调度无关
+                    while key in self.pending:
+                        self.done.wait()
+            if key not in self.pending:
+                plan = self.results.pop(key, None)
+                if plan is not None:
+                    boss.plan = plan
+
+            boss.plan_timer -= 1
+            if key in self.pending or boss.plan_timer > 0:
+                return
+            boss.plan_timer = self.interval
+            boss.plan_wait = self.latency
+            self.pending.add(key)
+        self.requests.put((key, BossSnapshot(boss, player, world)))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import math
+from constants import *
+
+
+class EnemyUpdateScheduler:
+    """敌人更新调度器 - 按与摄像机的距离降低远处敌人的更新频率，并让远处闲置的敌人休眠
+    （只有站在地面上原地闲置的敌人才休眠，闲置时间结束时唤醒，休眠不会改变敌人的位置和巡逻节奏）"""
+
+    def __init__(self, bands=None, far_interval=AI_LOD_FAR_INTERVAL,
+                 sleep_distance=AI_SLEEP_DISTANCE, wake_distance=AI_WAKE_DISTANCE):
+        self.bands = bands if bands is not None else AI_LOD_BANDS
+        self.far_interval = far_interval
+        self.sleep_distance = sleep_distance
+        self.wake_distance = wake_distance
+
+        self.frame = 0
+        self.focus_x = 0
+        self.focus_y = 0
+        self.next_phase = 0
+
+        # 统计信息，开发者模式下显示在屏幕上，方便观察调度效果
+        self.updated_count = 0
+        self.sleeping_count = 0
+
+    def begin_frame(self, scroll):
+        """每帧开始时调用，记录摄像机中心位置"""
+        self.frame += 1
+        self.focus_x = scroll[0] + SCREEN_WIDTH // 2
+        self.focus_y = scroll[1] + SCREEN_HEIGHT // 2
+        self.updated_count = 0
+        self.sleeping_count = 0
+
+    def get_interval(self, distance):
+        """根据距离获取更新间隔（帧）"""
+        for max_distance, interval in self.bands:
+            if distance <= max_distance:
+                return interval
+        return self.far_interval
+
+    def update_enemy(self, enemy, world, player, particles):
+        """按调度规则更新单个敌人，返回本帧是否实际执行了更新"""
+        if not enemy.lod_enabled:
+            enemy.update(world, player, particles)
+            self.updated_count += 1
+            return True
+
+        if enemy.lod_last_tick is None:
+            enemy.lod_last_tick = self.frame - 1
+            enemy.lod_phase = self.next_phase
+            self.next_phase += 1
+
+        distance = math.sqrt((enemy.rect.centerx - self.focus_x) ** 2 +
+                             (enemy.rect.centery - self.focus_y) ** 2)
+        elapsed = self.frame - enemy.lod_last_tick
+        # 受到伤害的敌人立即按正常频率处理，保证死亡判定及时
+        disturbed = enemy.health <= 0 or enemy.hit_cooldown > 0
+
+        if enemy.sleeping:
+            # 闲置时间在本帧结束时也要唤醒，让敌人按原来的节奏开始巡逻
+            if distance > self.wake_distance and not disturbed and elapsed < enemy.idle_counter:
+                self.sleeping_count += 1
+                return False
+            # 唤醒：补算休眠期间的计时器，闲置的敌人本来就不移动，位置不需要补算
+            enemy.sleeping = False
+            enemy.advance_timers(elapsed - 1)
+            step = 1
+        else:
+            interval = self.get_interval(distance)
+            # 空中的敌人保持逐帧更新，保证下落和落地的物理结果不变
+            if interval > 1 and enemy.is_grounded() and not disturbed:
+                if (self.frame + enemy.lod_phase) % interval != 0:
+                    return False
+                enemy.advance_timers(elapsed - 1)
+                step = elapsed
+            else:
+                enemy.advance_timers(elapsed - 1)
+                step = 1
+
+        enemy.lod_step = step
+        enemy.lod_last_tick = self.frame
+        enemy.update(world, player, particles)
+        enemy.lod_step = 1
+        self.updated_count += 1
+
+        # 只让原地闲置、不在攻击冷却中的敌人休眠，行走和追逐中的敌人继续按降频更新
+        if (enemy.alive and not enemy.moving and enemy.attack_cooldown == 0
+                and distance > self.sleep_distance and enemy.is_grounded()):
+            enemy.sleeping = True
+            enemy.velocity_x = 0  # 休眠期间位置保持不变
+
+        return True
@@ -2,9 +2,11 @@ import os
 import sys
 
 import pygame
-import math
 from enum import Enum
-from constants import GRAVITY, GREEN, RED, BLUE, PURPLE, BROWN
+from constants import GRAVITY, GREEN, RED, BLUE, PURPLE, BROWN, HazardTarget, FLOWER_TRAP_DURATION
+from hazards import HazardZone
+from combat import combat_resolver
+from ecs import components
 
 
 # 角色类型
@@ -136,8 +138,13 @@ def load_character_animations(character_name, scale=1):
     return [idle_frames, run_frames, jump_frames, attack_frames]
 
 
-# 角色基类
+# 角色基类（开启ECS时，登记到实体存储后以下属性读写存储中的数组）
+@components('velocity_y', 'health', 'max_health', 'hit_cooldown', 'attack_cooldown', 'alive')
 class Character(pygame.sprite.Sprite):
+    registry_order = -1  # 玩家不在敌人注册表中，战斗结算时排在所有敌人之前
+    ecs_store = None
+    ecs_slot = -1
+
     def __init__(self, x, y, character_type, scale):
         pygame.sprite.Sprite.__init__(self)
         self.character_type = character_type
@@ -174,6 +181,7 @@ class Character(pygame.sprite.Sprite):
         self.hit = False
         self.hit_cooldown = 0
         self.invulnerability = 0  # 无敌时间
+        self.damage_multiplier = 1.0  # 攻击力倍率（力量增益时大于1）
         
         # 技能变量
         self.skill_cooldowns = [0, 0, 0]  # 三个技能的冷却时间
@@ -253,15 +261,17 @@ class Character(pygame.sprite.Sprite):
         if self.jump_cooldown > 0:
             self.jump_cooldown -= 1
 
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= 1
-
         for i in range(len(self.skill_cooldowns)):
             if self.skill_cooldowns[i] > 0:
                 self.skill_cooldowns[i] -= 1
 
-        if self.hit_cooldown > 0:
-            self.hit_cooldown -= 1
+        # 登记到数组存储时攻击和受伤冷却由cooldown_system处理
+        if self.ecs_store is None:
+            if self.attack_cooldown > 0:
+                self.attack_cooldown -= 1
+
+            if self.hit_cooldown > 0:
+                self.hit_cooldown -= 1
 
         if self.invulnerability > 0:
             self.invulnerability -= 1
@@ -350,20 +360,10 @@ class Character(pygame.sprite.Sprite):
             # 切换到攻击动作
             self.update_action(3)  # 3: 攻击动作
             self.action_timer = 15  # 攻击动作持续15帧
-            # 检查是否击中敌人
-            for enemy in enemies:
-                if attacking_rect.colliderect(enemy.rect) and enemy.alive:
-                    # 开发者模式下秒杀敌人
-                    if dev_mode:
-                        enemy.health = 0
-                    else:
-                        if not enemy.shield_active:
-                            enemy.health -= int(20 * (1+score_factor/100))
-                        else:
-                            enemy.take_damage(int(20 * (1+score_factor/100)), particles)
-                    enemy.hit = True
-                    enemy.hit_cooldown = 10
-                    particles.add_particles(enemy.rect.centerx, enemy.rect.centery, RED)
+            # 登记攻击范围，帧末由战斗结算通过空间索引找出被击中的敌人（开发者模式下秒杀敌人）
+            damage = int(20 * (1+score_factor/100) * self.damage_multiplier)
+            combat_resolver.queue_rect(attacking_rect, damage, source=self, tag="attack", lethal=dev_mode,
+                                       hit_cooldown=10, color=RED, particle_count=20)
 
             particles.add_particles(self.rect.centerx + 30 * self.direction, self.rect.centery, GREEN)
 
@@ -425,15 +425,9 @@ class Lia(Character):
             slow_duration = 120  # 减速持续2秒(120帧)
             slow_factor = 0.5  # 减速至原速度的50%
 
-            for enemy in enemies:
-                dist = math.sqrt((enemy.rect.centerx - self.rect.centerx) ** 2 +
-                                 (enemy.rect.centery - self.rect.centery) ** 2)
-                if dist <= skill_range and enemy.alive:
-                    # 使用新方法应用减速效果
-                    enemy.apply_slow(slow_factor, slow_duration)
-                    enemy.hit = True
-                    enemy.hit_cooldown = 5
-                    particles.add_particles(enemy.rect.centerx, enemy.rect.centery, GREEN, count=30)
+            combat_resolver.queue_radius(self.rect.centerx, self.rect.centery, skill_range, 0, source=self,
+                                         tag="vine", slow=(slow_factor, slow_duration), hit_cooldown=5,
+                                         color=GREEN, particle_count=30)
 
             return True
         return False
@@ -459,7 +453,7 @@ class Lia(Character):
             return True
         return False
 
-    def skill_3(self, enemies, particles, score_factor):
+    def skill_3(self, world, enemies, particles, score_factor):
         # 花朵陷阱
         if self.skill_cooldowns[2] == 0 and self.magic >= self.skill_costs[2]:
             self.skill_cooldowns[2] = 180  # 3秒冷却
@@ -474,13 +468,13 @@ class Lia(Character):
             slow_duration = 180  # 减速持续3秒(180帧)
             slow_factor = 0.3  # 减速至原速度的30%
 
-            for enemy in enemies:
-                if trap_rect.colliderect(enemy.rect) and enemy.alive:
-                    # 使用新方法应用减速效果
-                    enemy.apply_slow(slow_factor, slow_duration)
-                    enemy.health -= int(15 * (1+score_factor/10))
-                    enemy.hit = True
-                    enemy.hit_cooldown = 15
+            combat_resolver.queue_rect(trap_rect, int(15 * (1+score_factor/10)), source=self, tag="trap",
+                                       slow=(slow_factor, slow_duration), hit_cooldown=15)
+
+            # 陷阱留在地面上，之后走进来的敌人同样会被减速
+            world.hazards.add_zone(HazardZone(trap_rect, HazardTarget.ENEMY, owner=self,
+                                              slow_factor=slow_factor, slow_duration=slow_duration,
+                                              color=PURPLE, particle_chance=0.2), FLOWER_TRAP_DURATION)
 
             particles.add_particles(trap_x, trap_y, PURPLE, count=50, size=6)
             return True
@@ -510,14 +504,9 @@ class Karn(Character):
             
             # 攻击范围内的所有敌人
             skill_range = 150
-            for enemy in enemies:
-                dist = math.sqrt((enemy.rect.centerx - self.rect.centerx)**2 + 
-                                (enemy.rect.centery - self.rect.centery)**2)
-                if dist <= skill_range and enemy.alive:
-                    enemy.health -= int(30 * (1+score_factor/10))
-                    enemy.hit = True
-                    enemy.hit_cooldown = 15
-                    enemy.velocity_y = -5  # 击退效果
+            combat_resolver.queue_radius(self.rect.centerx, self.rect.centery, skill_range,
+                                         int(30 * (1+score_factor/10)), source=self, tag="quake",
+                                         hit_cooldown=15, velocity_y=-5)  # 击退效果
             
             particles.add_particles(self.rect.centerx, self.rect.bottom, BROWN, count=40, size=8)
             return True
@@ -4,8 +4,20 @@
 import pygame
 import random
 import math
+from array import array
 from enum import Enum
+from itertools import accumulate
+from types import MappingProxyType
 from constants import *
+from spatial_hash import SpatialHash
+from status_effects import effect_engine, SPEED_BOOST, STRENGTH_BOOST
+from achievements import achievement_tracker, COLLECT
+
+# 临时增益类型对应的状态效果
+BOOST_EFFECTS = {
+    'speed': SPEED_BOOST,
+    'strength': STRENGTH_BOOST,
+}
 
 
 class CollectibleType(Enum):
@@ -21,6 +33,26 @@ class CollectibleType(Enum):
     POTION = "potion"               # 药水 - 各种效果
 
 
+# 浮动动画的正弦查找表（振幅5像素）
+FLOAT_TABLE_SIZE = 256
+FLOAT_TABLE = array('d', (math.sin(index * 2 * math.pi / FLOAT_TABLE_SIZE) * 5 for index in range(FLOAT_TABLE_SIZE)))
+
+
+class AnimationClock:
+    """收集品共用的动画时钟 - 动画状态都由时钟和各自的生成帧、相位算出，每帧只推进时钟"""
+
+    def __init__(self):
+        self.frame = 0
+        self.ticks = 0
+
+    def advance(self):
+        self.frame += 1
+        self.ticks = pygame.time.get_ticks()
+
+
+animation_clock = AnimationClock()
+
+
 class CollectibleRarity(Enum):
     """收集品稀有度"""
     COMMON = 1      # 普通 - 白色
@@ -30,163 +62,241 @@ class CollectibleRarity(Enum):
     LEGENDARY = 5   # 传说 - 金色
 
 
+# 基础颜色映射
+TYPE_COLORS = {
+    CollectibleType.SEED: (139, 69, 19),        # 棕色
+    CollectibleType.CRYSTAL: (0, 191, 255),     # 蓝色
+    CollectibleType.BERRY: (220, 20, 60),       # 红色
+    CollectibleType.FLOWER: (255, 105, 180),    # 粉色
+    CollectibleType.LEAF: (34, 139, 34),        # 绿色
+    CollectibleType.MUSHROOM: (160, 82, 45),    # 褐色
+    CollectibleType.COIN: (255, 215, 0),        # 金色
+    CollectibleType.ARTIFACT: (128, 0, 128),    # 紫色
+    CollectibleType.POTION: (50, 205, 50)       # 青绿色
+}
+
+# 稀有度颜色调整
+RARITY_MULTIPLIERS = {
+    CollectibleRarity.COMMON: 1.0,
+    CollectibleRarity.UNCOMMON: 1.1,
+    CollectibleRarity.RARE: 1.2,
+    CollectibleRarity.EPIC: 1.3,
+    CollectibleRarity.LEGENDARY: 1.5
+}
+
+# 稀有度边框颜色
+RARITY_BORDER_COLORS = {
+    CollectibleRarity.COMMON: (200, 200, 200),      # 灰色
+    CollectibleRarity.UNCOMMON: (0, 255, 0),        # 绿色
+    CollectibleRarity.RARE: (0, 112, 255),          # 蓝色
+    CollectibleRarity.EPIC: (163, 53, 238),         # 紫色
+    CollectibleRarity.LEGENDARY: (255, 215, 0)      # 金色
+}
+
+# 药水随机获得的效果
+POTION_EFFECTS = ['health', 'magic', 'speed', 'strength']
+
+
+# 生成时的类型和稀有度抽样表（累积权重，抽样时二分查找）
+COLLECTIBLE_TYPES = tuple(CollectibleType)
+RARITY_ORDER = tuple(CollectibleRarity)
+RARITY_CUM_WEIGHTS = tuple(accumulate([60, 25, 10, 4, 1]))  # 普通, 不常见, 稀有, 史诗, 传说
+
+COLLECTIBLE_SIZE = 32  # 收集品边长（像素）
+
+
+def cumulative_table(weights):
+    """把 {取值: 权重} 转成 (取值元组, 累积权重元组)"""
+    values = tuple(weights)
+    return values, tuple(accumulate(weights[value] for value in values))
+
+
+def standable_cells(world, region):
+    """区域内可站立的空格子（下方是实心地面）"""
+    navigation = world.navigation
+    first_col = max(0, region.left // TILE_SIZE)
+    last_col = min(world.grid_cols - 1, (region.right - 1) // TILE_SIZE)
+    first_row = max(0, region.top // TILE_SIZE)
+    last_row = min(world.grid_rows - 1, (region.bottom - 1) // TILE_SIZE)
+    return [(col, row) for row in range(first_row, last_row + 1) for col in range(first_col, last_col + 1)
+            if navigation.is_floor(col, row)]
+
+
+class CollectibleSpec:
+    """收集品规格 - 同一(类型, 稀有度)的颜色、边框、效果和贴图编号，所有同类收集品共用，不可修改"""
+    __slots__ = ("collectible_type", "rarity", "color", "border_color", "effects", "sprite_id")
+
+    def __init__(self, collectible_type, rarity, effects, sprite_id):
+        base_color = TYPE_COLORS.get(collectible_type, (255, 255, 255))
+        multiplier = RARITY_MULTIPLIERS[rarity]
+        object.__setattr__(self, "collectible_type", collectible_type)
+        object.__setattr__(self, "rarity", rarity)
+        # 应用稀有度调整
+        object.__setattr__(self, "color", tuple(min(255, int(c * multiplier)) for c in base_color))
+        object.__setattr__(self, "border_color", RARITY_BORDER_COLORS[rarity])
+        object.__setattr__(self, "effects", MappingProxyType(effects))
+        object.__setattr__(self, "sprite_id", sprite_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CollectibleSpec是只读的")
+
+
+def effect_variants(collectible_type, rarity):
+    """收集品可能的效果数值，药水每种随机效果一个变体"""
+    rarity_multiplier = rarity.value
+
+    if collectible_type == CollectibleType.SEED:
+        return [{'forest_health': 10 * rarity_multiplier}]
+    elif collectible_type == CollectibleType.CRYSTAL:
+        return [{'magic': 15 * rarity_multiplier}]
+    elif collectible_type == CollectibleType.BERRY:
+        return [{'health': 20 * rarity_multiplier}]
+    elif collectible_type == CollectibleType.FLOWER:
+        return [{'score': 50 * rarity_multiplier}]
+    elif collectible_type == CollectibleType.LEAF:
+        return [{'experience': 25 * rarity_multiplier}]
+    elif collectible_type == CollectibleType.MUSHROOM:
+        return [{'temp_boost': MappingProxyType({'type': 'speed', 'value': 1.5, 'duration': 300})}]
+    elif collectible_type == CollectibleType.COIN:
+        return [{'coins': 5 * rarity_multiplier}]
+    elif collectible_type == CollectibleType.ARTIFACT:
+        return [{'score': 200 * rarity_multiplier, 'all_stats': 5 * rarity_multiplier}]
+    elif collectible_type == CollectibleType.POTION:
+        variants = []
+        for effect_type in POTION_EFFECTS:
+            if effect_type in ['health', 'magic']:
+                variants.append({effect_type: 30 * rarity_multiplier})
+            else:
+                variants.append({'temp_boost': MappingProxyType({
+                    'type': effect_type,
+                    'value': 1.3 + (0.1 * rarity_multiplier),
+                    'duration': 600
+                })})
+        return variants
+    return [{}]
+
+
+def build_collectible_specs():
+    """预先生成所有(类型, 稀有度)的规格，贴图编号按组合编号"""
+    specs = {}
+    for type_index, collectible_type in enumerate(CollectibleType):
+        for rarity_index, rarity in enumerate(CollectibleRarity):
+            sprite_id = type_index * len(CollectibleRarity) + rarity_index
+            specs[(collectible_type, rarity)] = tuple(CollectibleSpec(collectible_type, rarity, effects, sprite_id)
+                                                      for effects in effect_variants(collectible_type, rarity))
+    return specs
+
+
+# (类型, 稀有度) -> 规格变体元组
+COLLECTIBLE_SPECS = build_collectible_specs()
+
+
 class Collectible:
-    """收集品基类"""
-    
+    """收集品 - 只保存位置和状态，颜色、效果等共用数据在规格表中"""
+    __slots__ = ("rect", "spec", "collected", "active", "list_index", "spawn_frame", "float_phase", "attracted")
+
+    # 所有收集品相同的参数
+    float_speed = 2
+    rotation_speed = 3
+    glow_radius = 20
+    magnetic_range = COLLECTIBLE_MAGNETIC_RANGE
+    attract_speed = 5
+
     def __init__(self, x, y, collectible_type, rarity=CollectibleRarity.COMMON):
-        self.rect = pygame.Rect(x, y, 32, 32)
-        self.collectible_type = collectible_type
-        self.rarity = rarity
+        self.rect = pygame.Rect(x, y, COLLECTIBLE_SIZE, COLLECTIBLE_SIZE)
+        specs = COLLECTIBLE_SPECS[(collectible_type, rarity)]
+        # 只有药水有多个变体，随机选择一种效果
+        self.spec = specs[0] if len(specs) == 1 else random.choice(specs)
         self.collected = False
         self.active = True
-        
-        # 动画相关
-        self.float_offset = 0
-        self.float_speed = 2
-        self.rotation = 0
-        self.rotation_speed = 3
-        self.scale = 1.0
-        self.pulse_timer = 0
-        
-        # 发光效果
-        self.glow_radius = 20
-        self.glow_alpha = 100
-        
+        self.list_index = -1  # 在管理器列表中的位置，用于O(1)移除
+
+        # 动画相关（浮动、旋转、脉冲和发光都按动画时钟计算）
+        self.spawn_frame = animation_clock.frame
+
         # 磁性吸引效果
-        self.magnetic_range = 80
         self.attracted = False
-        self.attract_speed = 5
-        
-        # 根据类型和稀有度设置属性
-        self._set_properties()
-        
+
         # 生成随机的浮动相位，避免所有物品同步浮动
         self.float_phase = random.uniform(0, math.pi * 2)
-        
-    def _set_properties(self):
-        """根据类型和稀有度设置收集品属性"""
-        # 基础颜色映射
-        type_colors = {
-            CollectibleType.SEED: (139, 69, 19),        # 棕色
-            CollectibleType.CRYSTAL: (0, 191, 255),     # 蓝色
-            CollectibleType.BERRY: (220, 20, 60),       # 红色
-            CollectibleType.FLOWER: (255, 105, 180),    # 粉色
-            CollectibleType.LEAF: (34, 139, 34),        # 绿色
-            CollectibleType.MUSHROOM: (160, 82, 45),    # 褐色
-            CollectibleType.COIN: (255, 215, 0),        # 金色
-            CollectibleType.ARTIFACT: (128, 0, 128),    # 紫色
-            CollectibleType.POTION: (50, 205, 50)       # 青绿色
-        }
-        
-        # 稀有度颜色调整
-        rarity_multipliers = {
-            CollectibleRarity.COMMON: 1.0,
-            CollectibleRarity.UNCOMMON: 1.1,
-            CollectibleRarity.RARE: 1.2,
-            CollectibleRarity.EPIC: 1.3,
-            CollectibleRarity.LEGENDARY: 1.5
-        }
-        
-        base_color = type_colors.get(self.collectible_type, (255, 255, 255))
-        multiplier = rarity_multipliers[self.rarity]
-        
-        # 应用稀有度调整
-        self.color = tuple(min(255, int(c * multiplier)) for c in base_color)
-        
-        # 稀有度边框颜色
-        self.border_color = {
-            CollectibleRarity.COMMON: (200, 200, 200),      # 灰色
-            CollectibleRarity.UNCOMMON: (0, 255, 0),        # 绿色
-            CollectibleRarity.RARE: (0, 112, 255),          # 蓝色
-            CollectibleRarity.EPIC: (163, 53, 238),         # 紫色
-            CollectibleRarity.LEGENDARY: (255, 215, 0)      # 金色
-        }[self.rarity]
-        
-        # 设置收集效果值
-        self._set_effect_values()
-        
-    def _set_effect_values(self):
-        """设置收集品的效果数值"""
-        rarity_multiplier = self.rarity.value
-        
-        self.effects = {}
-        
-        if self.collectible_type == CollectibleType.SEED:
-            self.effects['forest_health'] = 10 * rarity_multiplier
-        elif self.collectible_type == CollectibleType.CRYSTAL:
-            self.effects['magic'] = 15 * rarity_multiplier
-        elif self.collectible_type == CollectibleType.BERRY:
-            self.effects['health'] = 20 * rarity_multiplier
-        elif self.collectible_type == CollectibleType.FLOWER:
-            self.effects['score'] = 50 * rarity_multiplier
-        elif self.collectible_type == CollectibleType.LEAF:
-            self.effects['experience'] = 25 * rarity_multiplier
-        elif self.collectible_type == CollectibleType.MUSHROOM:
-            self.effects['temp_boost'] = {'type': 'speed', 'value': 1.5, 'duration': 300}
-        elif self.collectible_type == CollectibleType.COIN:
-            self.effects['coins'] = 5 * rarity_multiplier
-        elif self.collectible_type == CollectibleType.ARTIFACT:
-            self.effects['score'] = 200 * rarity_multiplier
-            self.effects['all_stats'] = 5 * rarity_multiplier
-        elif self.collectible_type == CollectibleType.POTION:
-            potion_effects = ['health', 'magic', 'speed', 'strength']
-            effect_type = random.choice(potion_effects)
-            if effect_type in ['health', 'magic']:
-                self.effects[effect_type] = 30 * rarity_multiplier
-            else:
-                self.effects['temp_boost'] = {
-                    'type': effect_type, 
-                    'value': 1.3 + (0.1 * rarity_multiplier), 
-                    'duration': 600
-                }
-    
+
+    @property
+    def collectible_type(self):
+        return self.spec.collectible_type
+
+    @property
+    def rarity(self):
+        return self.spec.rarity
+
+    @property
+    def color(self):
+        return self.spec.color
+
+    @property
+    def border_color(self):
+        return self.spec.border_color
+
+    @property
+    def effects(self):
+        return self.spec.effects
+
     def update(self, player=None, particle_system=None):
         """更新收集品状态"""
         if not self.active or self.collected:
             return
-            
-        # 浮动动画
-        self.float_offset = math.sin(pygame.time.get_ticks() * 0.003 + self.float_phase) * 5
-        
-        # 旋转动画
-        self.rotation += self.rotation_speed
-        if self.rotation >= 360:
-            self.rotation = 0
-            
-        # 脉冲效果
-        self.pulse_timer += 1
-        self.scale = 1.0 + math.sin(self.pulse_timer * 0.1) * 0.1
-        
-        # 发光效果变化
-        self.glow_alpha = 80 + math.sin(self.pulse_timer * 0.05) * 40
-        
-        # 检查磁性吸引
+
         if player:
-            distance = math.sqrt((self.rect.centerx - player.rect.centerx)**2 + 
-                               (self.rect.centery - player.rect.centery)**2)
+            self.update_attraction(player, particle_system)
+
+    @property
+    def pulse_timer(self):
+        return animation_clock.frame - self.spawn_frame
+
+    @property
+    def rotation(self):
+        return (self.pulse_timer * self.rotation_speed) % 360
+
+    @property
+    def scale(self):
+        return 1.0 + math.sin(self.pulse_timer * 0.1) * 0.1
+
+    @property
+    def glow_alpha(self):
+        return 80 + math.sin(self.pulse_timer * 0.05) * 40
+
+    @property
+    def float_offset(self):
+        # 查表代替每个收集品每帧的sin计算
+        phase = animation_clock.ticks * 0.003 + self.float_phase
+        return FLOAT_TABLE[int(phase * (FLOAT_TABLE_SIZE / (2 * math.pi))) % FLOAT_TABLE_SIZE]
+
+    def update_attraction(self, player, particle_system=None):
+        """磁性吸引和拾取检测"""
+        distance = math.sqrt((self.rect.centerx - player.rect.centerx)**2 + 
+                           (self.rect.centery - player.rect.centery)**2)
+        
+        if distance < self.magnetic_range:
+            self.attracted = True
+            # 向玩家移动
+            dx = player.rect.centerx - self.rect.centerx
+            dy = player.rect.centery - self.rect.centery
             
-            if distance < self.magnetic_range:
-                self.attracted = True
-                # 向玩家移动
-                dx = player.rect.centerx - self.rect.centerx
-                dy = player.rect.centery - self.rect.centery
+            if distance > 0:
+                move_x = (dx / distance) * self.attract_speed
+                move_y = (dy / distance) * self.attract_speed
+                self.rect.x += move_x
+                self.rect.y += move_y
                 
-                if distance > 0:
-                    move_x = (dx / distance) * self.attract_speed
-                    move_y = (dy / distance) * self.attract_speed
-                    self.rect.x += move_x
-                    self.rect.y += move_y
-                    
-                # 创建吸引粒子效果
-                if particle_system and random.randint(1, 5) == 1:
-                    particle_system.create_attract_particle(
-                        self.rect.centerx, self.rect.centery, 
-                        player.rect.centerx, player.rect.centery
-                    )
-                    
-            # 检查收集
-            if distance < 25:  # 收集范围
-                self.collect(player, particle_system)
+            # 创建吸引粒子效果
+            if particle_system and random.randint(1, 5) == 1:
+                particle_system.create_attract_particle(
+                    self.rect.centerx, self.rect.centery, 
+                    player.rect.centerx, player.rect.centery
+                )
+                
+        # 检查收集
+        if distance < 25:  # 收集范围
+            self.collect(player, particle_system)
 
     def collect(self, player, particle_system=None):
         """收集物品 - 增强版本显示收集信息"""
@@ -247,57 +357,48 @@ class Collectible:
                 player.magic = min(player.max_magic, player.magic + value)
     
     def _apply_temporary_boost(self, player, boost_info):
-        """应用临时增益效果"""
-        if not hasattr(player, 'active_boosts'):
-            player.active_boosts = []
-            
-        boost = {
-            'type': boost_info['type'],
-            'value': boost_info['value'],
-            'duration': boost_info['duration'],
-            'timer': boost_info['duration']
-        }
-        
-        player.active_boosts.append(boost)
-    
+        """应用临时增益效果（由状态效果引擎计时，到期自动恢复）"""
+        kind = BOOST_EFFECTS.get(boost_info['type'])
+        if kind is not None:
+            effect_engine.apply(player, kind, boost_info['value'], boost_info['duration'])
+
     def draw(self, screen, scroll):
-        """绘制收集品"""
+        """绘制收集品（从图集中按当前动画相位贴一次图）"""
         if not self.active or self.collected:
             return
-            
-        # 计算绘制位置
-        draw_x = self.rect.x - scroll[0]
-        draw_y = self.rect.y - scroll[1] + self.float_offset
-        
+
+        collectible_atlas.draw(screen, self, self.rect.x - scroll[0], self.rect.y - scroll[1] + self.float_offset)
+
+    def render(self, surface, draw_x, draw_y, scale, glow_alpha):
+        """按给定的缩放和发光透明度绘制一帧（图集预渲染时调用）"""
         # 绘制发光效果
         if self.rarity.value > 1:
-            glow_surface = pygame.Surface((self.glow_radius * 2, self.glow_radius * 2))
-            glow_surface.set_alpha(self.glow_alpha)
-            pygame.draw.circle(glow_surface, self.border_color,
-                             (self.glow_radius, self.glow_radius), self.glow_radius)
-            screen.blit(glow_surface, (draw_x - self.glow_radius + 16, 
-                                     draw_y - self.glow_radius + 16))
-        
+            alpha = int(glow_alpha)
+            glow_rect = pygame.Rect(draw_x - self.glow_radius + 16, draw_y - self.glow_radius + 16,
+                                    self.glow_radius * 2, self.glow_radius * 2)
+            surface.fill((0, 0, 0, alpha), glow_rect)
+            pygame.draw.circle(surface, (*self.border_color, alpha), glow_rect.center, self.glow_radius)
+
         # 绘制主体
-        scaled_size = int(32 * self.scale)
+        scaled_size = int(32 * scale)
         offset = (32 - scaled_size) // 2
-        
+
         # 绘制边框（稀有度颜色）
-        border_rect = pygame.Rect(draw_x + offset - 2, draw_y + offset - 2, 
+        border_rect = pygame.Rect(draw_x + offset - 2, draw_y + offset - 2,
                                  scaled_size + 4, scaled_size + 4)
-        pygame.draw.rect(screen, self.border_color, border_rect, 2)
-        
+        pygame.draw.rect(surface, self.border_color, border_rect, 2)
+
         # 绘制主体
         main_rect = pygame.Rect(draw_x + offset, draw_y + offset, scaled_size, scaled_size)
-        pygame.draw.rect(screen, self.color, main_rect)
-        
+        pygame.draw.rect(surface, self.color, main_rect)
+
         # 绘制类型标识
-        self._draw_type_icon(screen, draw_x + 16, draw_y + 16)
-        
+        self._draw_type_icon(surface, draw_x + 16, draw_y + 16)
+
         # 绘制稀有度星星
         if self.rarity.value > 1:
-            self._draw_rarity_stars(screen, draw_x, draw_y - 15)
-    
+            self._draw_rarity_stars(surface, draw_x, draw_y - 15)
+
     def _draw_type_icon(self, screen, center_x, center_y):
         """绘制类型图标"""
         icon_color = (255, 255, 255)
@@ -335,11 +436,66 @@ class Collectible:
             pygame.draw.circle(screen, star_color, (star_x, y), 2)
 
 
+class CollectibleAtlas:
+    """收集品图集 - 每种(类型, 稀有度)预先渲染一条动画帧带（发光、边框、主体、图标、星星），
+    绘制时按脉冲相位从帧带中贴一次图"""
+
+    # 每帧的大小，以及收集品左上角在帧内的位置（发光和星星会超出收集品矩形）
+    FRAME_WIDTH = 44
+    FRAME_HEIGHT = 56
+    ORIGIN_X = 6
+    ORIGIN_Y = 18
+
+    def __init__(self, frame_count=COLLECTIBLE_ANIMATION_FRAMES):
+        self.frame_count = frame_count
+        self.strips = {}  # 贴图编号 -> 横向排列的动画帧
+
+    def clear(self):
+        self.strips = {}
+
+    def frame_index(self, pulse_timer):
+        """脉冲计时对应的帧号，一条帧带覆盖一个发光周期（正好是两个缩放周期）"""
+        phase = (pulse_timer * 0.05) % (2 * math.pi)
+        return int(phase / (2 * math.pi) * self.frame_count) % self.frame_count
+
+    def get_strip(self, collectible):
+        """获取收集品对应的帧带，第一次用到时渲染"""
+        sprite_id = collectible.spec.sprite_id
+        strip = self.strips.get(sprite_id)
+        if strip is None:
+            strip = self.render_strip(collectible)
+            self.strips[sprite_id] = strip
+        return strip
+
+    def render_strip(self, collectible):
+        strip = pygame.Surface((self.FRAME_WIDTH * self.frame_count, self.FRAME_HEIGHT), pygame.SRCALPHA)
+        for index in range(self.frame_count):
+            # 取每帧相位区间的中点
+            phase = (index + 0.5) / self.frame_count * 2 * math.pi
+            scale = 1.0 + math.sin(phase * 2) * 0.1
+            glow_alpha = 80 + math.sin(phase) * 40
+            frame = strip.subsurface((index * self.FRAME_WIDTH, 0, self.FRAME_WIDTH, self.FRAME_HEIGHT))
+            collectible.render(frame, self.ORIGIN_X, self.ORIGIN_Y, scale, glow_alpha)
+        return strip
+
+    def draw(self, screen, collectible, x, y):
+        """把收集品当前动画帧贴到屏幕上，(x, y)为收集品左上角的屏幕坐标"""
+        strip = self.get_strip(collectible)
+        index = self.frame_index(collectible.pulse_timer)
+        screen.blit(strip, (x - self.ORIGIN_X, y - self.ORIGIN_Y),
+                    (index * self.FRAME_WIDTH, 0, self.FRAME_WIDTH, self.FRAME_HEIGHT))
+
+
+# 全局收集品图集，所有收集品共用
+collectible_atlas = CollectibleAtlas()
+
+
 class CollectibleManager:
     """收集品管理器"""
     
     def __init__(self):
         self.collectibles = []
+        self.spatial_index = SpatialHash()  # 收集品空间索引，生成、移动和拾取时增量维护
         self.collection_stats = {
             'total_collected': 0,
             'by_type': {ctype: 0 for ctype in CollectibleType},
@@ -347,85 +503,140 @@ class CollectibleManager:
             'coins': 0,
             'score': 0
         }
+        # 增量维护的汇总数据，HUD每帧查询时不需要重新统计
+        self.rare_collected = 0  # 稀有及以上
+        self.legendary_collected = 0
         
     def spawn_collectible(self, x, y, collectible_type=None, rarity=None):
         """生成收集品"""
         if collectible_type is None:
-            collectible_type = random.choice(list(CollectibleType))
-            
+            collectible_type = random.choice(COLLECTIBLE_TYPES)
+
         if rarity is None:
-            # 稀有度概率分布
-            rarity_chances = [60, 25, 10, 4, 1]  # 普通, 不常见, 稀有, 史诗, 传说
-            rarity_roll = random.randint(1, 100)
-            
-            if rarity_roll <= rarity_chances[0]:
-                rarity = CollectibleRarity.COMMON
-            elif rarity_roll <= sum(rarity_chances[:2]):
-                rarity = CollectibleRarity.UNCOMMON
-            elif rarity_roll <= sum(rarity_chances[:3]):
-                rarity = CollectibleRarity.RARE
-            elif rarity_roll <= sum(rarity_chances[:4]):
-                rarity = CollectibleRarity.EPIC
-            else:
-                rarity = CollectibleRarity.LEGENDARY
-                
-        collectible = Collectible(x, y, collectible_type, rarity)
+            # 按累积概率表抽取稀有度
+            rarity = random.choices(RARITY_ORDER, cum_weights=RARITY_CUM_WEIGHTS)[0]
+
+        return self._add(Collectible(x, y, collectible_type, rarity))
+
+    def _add(self, collectible):
+        # 登记到列表和空间索引
+        collectible.list_index = len(self.collectibles)
         self.collectibles.append(collectible)
+        self.spatial_index.insert(collectible)
         return collectible
-    
-    def spawn_level_collectibles(self, level, world_width=1000):
-        """为关卡生成收集品"""
+
+    def spawn_batch(self, count, region, type_weights=None, rarity_weights=None, world=None):
+        """批量生成收集品 - 类型、稀有度和位置一次性抽样
+        region为世界坐标矩形；给出world时只放在区域内可站立的空格子上，没有这样的格子时不生成
+        type_weights/rarity_weights为 {类型: 权重}，省略时类型均匀分布、稀有度按默认概率"""
+        if type_weights is None:
+            types, type_cum_weights = COLLECTIBLE_TYPES, None
+        else:
+            types, type_cum_weights = cumulative_table(type_weights)
+        if rarity_weights is None:
+            rarities, rarity_cum_weights = RARITY_ORDER, RARITY_CUM_WEIGHTS
+        else:
+            rarities, rarity_cum_weights = cumulative_table(rarity_weights)
+
+        sampled_types = random.choices(types, cum_weights=type_cum_weights, k=count)
+        sampled_rarities = random.choices(rarities, cum_weights=rarity_cum_weights, k=count)
+
+        if world is None:
+            xs = [random.randint(region.left, region.right - 1) for _ in range(count)]
+            ys = [random.randint(region.top, region.bottom - 1) for _ in range(count)]
+        else:
+            cells = standable_cells(world, region)
+            if not cells:
+                return []
+            # 收集品放在格子底部（站在下方的瓦片上），格子内水平位置随机
+            xs = []
+            ys = []
+            for col, row in random.choices(cells, k=count):
+                xs.append(col * TILE_SIZE + random.randint(0, TILE_SIZE - COLLECTIBLE_SIZE))
+                ys.append((row + 1) * TILE_SIZE - COLLECTIBLE_SIZE)
+
+        return [self._add(Collectible(x, y, collectible_type, rarity))
+                for x, y, collectible_type, rarity in zip(xs, ys, sampled_types, sampled_rarities)]
+
+    def spawn_level_collectibles(self, level, world_width=1000, world=None):
+        """为关卡生成收集品（给出world时只放在可站立的位置）"""
         # 清空现有收集品
-        self.collectibles = []
-        
-        # 基础收集品数量
-        base_count = 5 + level * 2
-        
+        self.clear_all()
+
+        if world is None:
+            region = pygame.Rect(100, 400, world_width - 199, 101)
+        else:
+            region = pygame.Rect(100, 0, world_width - 199, world.world_height)
+
         # 生成常规收集品
-        for _ in range(base_count):
-            x = random.randint(100, world_width - 100)
-            y = random.randint(400, 500)
-            self.spawn_collectible(x, y)
-            
+        base_count = 5 + level * 2
+        self.spawn_batch(base_count, region, world=world)
+
         # 生成特殊收集品
         special_count = max(1, level // 2)
-        for _ in range(special_count):
-            x = random.randint(100, world_width - 100)
-            y = random.randint(400, 500)
-            special_types = [CollectibleType.ARTIFACT, CollectibleType.POTION]
-            special_type = random.choice(special_types)
-            rarity = random.choice([CollectibleRarity.RARE, CollectibleRarity.EPIC])
-            self.spawn_collectible(x, y, special_type, rarity)
-    
+        self.spawn_batch(special_count, region,
+                         type_weights={CollectibleType.ARTIFACT: 1, CollectibleType.POTION: 1},
+                         rarity_weights={CollectibleRarity.RARE: 1, CollectibleRarity.EPIC: 1},
+                         world=world)
+
     def update(self, player, particle_system=None):
-        """更新所有收集品"""
-        for collectible in self.collectibles[:]:  # 使用切片来避免修改列表时的问题
-            if collectible.active:
-                collectible.update(player, particle_system)
-                
-                # 检查是否被收集
-                if collectible.collected:
-                    self._update_stats(collectible)
-                    
-            # 移除已收集的物品
+        """更新所有收集品 - 动画只推进共用时钟，吸引和拾取只检查玩家附近格子里的收集品"""
+        animation_clock.advance()
+
+        collected = []
+        nearby = self.spatial_index.query_radius(player.rect.centerx, player.rect.centery,
+                                                 COLLECTIBLE_MAGNETIC_RANGE)
+        for collectible in nearby:
+            if not collectible.active:
+                continue
+            old_rect = collectible.rect.copy()
+            collectible.update_attraction(player, particle_system)
+
             if collectible.collected:
-                self.collectibles.remove(collectible)
+                self.spatial_index.remove(collectible, old_rect)
+                self._update_stats(collectible)
+                collected.append(collectible)
+            elif collectible.rect != old_rect:
+                # 被吸引移动后更新索引中的位置
+                self.spatial_index.remove(collectible, old_rect)
+                self.spatial_index.insert(collectible)
+
+        # 移除已收集的物品
+        for collectible in collected:
+            self._remove_from_list(collectible)
+
+    def _remove_from_list(self, collectible):
+        # 用列表末尾的收集品填补空位，O(1)移除（绘制顺序不影响结果）
+        last = self.collectibles.pop()
+        if last is not collectible:
+            self.collectibles[collectible.list_index] = last
+            last.list_index = collectible.list_index
+        collectible.list_index = -1
     
     def _update_stats(self, collectible):
         """更新收集统计"""
         self.collection_stats['total_collected'] += 1
         self.collection_stats['by_type'][collectible.collectible_type] += 1
         self.collection_stats['by_rarity'][collectible.rarity] += 1
+        if collectible.rarity.value >= 3:
+            self.rare_collected += 1
+        if collectible.rarity == CollectibleRarity.LEGENDARY:
+            self.legendary_collected += 1
         
         # 更新特殊统计
         if 'coins' in collectible.effects:
             self.collection_stats['coins'] += collectible.effects['coins']
         if 'score' in collectible.effects:
             self.collection_stats['score'] += collectible.effects['score']
+
+        achievement_tracker.emit(COLLECT, type=collectible.collectible_type, rarity=collectible.rarity,
+                                 coins=collectible.effects.get('coins', 0), score=collectible.effects.get('score', 0))
     
     def draw(self, screen, scroll):
-        """绘制所有收集品"""
-        for collectible in self.collectibles:
+        """绘制屏幕范围内的收集品"""
+        view = pygame.Rect(scroll[0] - CollectibleAtlas.FRAME_WIDTH, scroll[1] - CollectibleAtlas.FRAME_HEIGHT,
+                           SCREEN_WIDTH + CollectibleAtlas.FRAME_WIDTH * 2, SCREEN_HEIGHT + CollectibleAtlas.FRAME_HEIGHT * 2)
+        for collectible in self.spatial_index.query_rect(view):
             collectible.draw(screen, scroll)
     
     def get_collection_progress(self):
@@ -438,17 +649,12 @@ class CollectibleManager:
     def clear_all(self):
         """清空所有收集品"""
         self.collectibles = []
+        self.spatial_index.clear()
         
     def get_nearby_collectibles(self, x, y, radius=100):
         """获取附近的收集品"""
-        nearby = []
-        for collectible in self.collectibles:
-            if collectible.active:
-                distance = math.sqrt((collectible.rect.centerx - x)**2 + 
-                                   (collectible.rect.centery - y)**2)
-                if distance <= radius:
-                    nearby.append(collectible)
-        return nearby
+        return [collectible for collectible in self.spatial_index.query_radius(x, y, radius)
+                if collectible.active]
 
     def get_collection_summary(self):
         """获取收集摘要信息"""
@@ -460,41 +666,31 @@ class CollectibleManager:
             'progress_percentage': self.get_collection_progress(),
             'coins': self.collection_stats['coins'],
             'score': self.collection_stats['score'],
-            'rare_items': sum(count for rarity, count in self.collection_stats['by_rarity'].items()
-                              if rarity.value >= 3),  # 稀有及以上
-            'legendary_items': self.collection_stats['by_rarity'].get(
-                next(r for r in CollectibleRarity if r.value == 5), 0
-            )
+            'rare_items': self.rare_collected,  # 稀有及以上
+            'legendary_items': self.legendary_collected
         }
 
         return summary
 
-    def get_achievement_progress(self):
-        """获取成就进度"""
-        achievements = {
-            'collector': {
-                'name': '收集家',
-                'description': '收集100个物品',
-                'progress': min(100, self.collection_stats['total_collected']),
-                'target': 100,
-                'completed': self.collection_stats['total_collected'] >= 100
-            },
-            'treasure_hunter': {
-                'name': '寻宝者',
-                'description': '收集10个稀有物品',
-                'progress': min(10, sum(count for rarity, count in self.collection_stats['by_rarity'].items()
-                                        if rarity.value >= 3)),
-                'target': 10,
-                'completed': sum(count for rarity, count in self.collection_stats['by_rarity'].items()
-                                 if rarity.value >= 3) >= 10
-            },
-            'wealthy': {
-                'name': '富有者',
-                'description': '收集1000金币',
-                'progress': min(1000, self.collection_stats['coins']),
-                'target': 1000,
-                'completed': self.collection_stats['coins'] >= 1000
-            }
-        }
+    def export_stats(self):
+        """存档用的收集统计，枚举键保存为名称"""
+        stats = dict(self.collection_stats)
+        stats['by_type'] = {ctype.name: count for ctype, count in self.collection_stats['by_type'].items()}
+        stats['by_rarity'] = {rarity.name: count for rarity, count in self.collection_stats['by_rarity'].items()}
+        return stats
 
-        return achievements
\ No newline at end of file
+    def load_stats(self, stats):
+        """从存档恢复收集统计，并重新计算稀有物品汇总"""
+        for key in ('total_collected', 'coins', 'score'):
+            self.collection_stats[key] = stats.get(key, 0)
+        for ctype in CollectibleType:
+            self.collection_stats['by_type'][ctype] = stats.get('by_type', {}).get(ctype.name, 0)
+        for rarity in CollectibleRarity:
+            self.collection_stats['by_rarity'][rarity] = stats.get('by_rarity', {}).get(rarity.name, 0)
+        by_rarity = self.collection_stats['by_rarity']
+        self.rare_collected = sum(count for rarity, count in by_rarity.items() if rarity.value >= 3)
+        self.legendary_collected = by_rarity[CollectibleRarity.LEGENDARY]
+
+    def get_achievement_progress(self):
+        """获取收集类成就进度（由成就追踪器增量维护）"""
+        return achievement_tracker.get_progress("collection")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import random
+from constants import *
+
+
+class HitIntent:
+    """一次命中意图：本帧内先登记，帧末统一结算"""
+    __slots__ = ("target", "damage", "source", "tag", "hit_chance", "hit_cooldown", "velocity_x", "velocity_y",
+                 "forest_damage", "slow", "lethal", "color", "particle_count", "particle_at", "particle_options")
+
+    def __init__(self, target, damage, source=None, tag=None, hit_chance=1.0, hit_cooldown=10,
+                 velocity_x=None, velocity_y=None, forest_damage=0, slow=None, lethal=False,
+                 color=RED, particle_count=0, particle_at=None, particle_options=None):
+        self.target = target
+        self.damage = damage
+        self.source = source  # 攻击来源，与tag一起用于去重
+        self.tag = tag  # 攻击名称，同一来源的同一种攻击每帧对同一目标只结算一次
+        self.hit_chance = hit_chance  # 触发受伤效果的几率
+        self.hit_cooldown = hit_cooldown
+        self.velocity_x = velocity_x  # 击退速度，None表示不改变
+        self.velocity_y = velocity_y
+        self.forest_damage = forest_damage  # 命中时对森林健康度造成的伤害
+        self.slow = slow  # (减速倍率, 持续帧数)
+        self.lethal = lethal  # 开发者模式下直接击杀
+        self.color = color
+        self.particle_count = particle_count
+        self.particle_at = particle_at  # 粒子位置，None表示目标中心
+        self.particle_options = particle_options
+
+
+class AreaIntent:
+    """范围攻击意图：结算时通过敌人空间索引一次性找出范围内的目标"""
+    __slots__ = ("rect", "center", "radius", "template")
+
+    def __init__(self, template, rect=None, center=None, radius=0):
+        self.template = template  # target为None的HitIntent，命中的每个敌人复制一份
+        self.rect = rect
+        self.center = center
+        self.radius = radius
+
+
+class CombatResolver:
+    """战斗结算 - 攻击只登记意图，帧末统一去重、按空间索引批量查找目标、处理护盾和无敌，结果与更新顺序无关"""
+
+    def __init__(self):
+        self.intents = []
+        self.area_intents = []
+        self.events = []  # 本帧结算产生的事件 (事件名, 目标)：player_hit驱动受伤音效，enemy_killed驱动成就
+
+    def clear(self):
+        self.intents = []
+        self.area_intents = []
+        self.events = []
+
+    def queue_hit(self, target, damage, **options):
+        """登记对单个目标的命中"""
+        self.intents.append(HitIntent(target, damage, **options))
+
+    def queue_rect(self, rect, damage, **options):
+        """登记对矩形范围内所有敌人的命中"""
+        self.area_intents.append(AreaIntent(HitIntent(None, damage, **options), rect=rect))
+
+    def queue_radius(self, x, y, radius, damage, **options):
+        """登记对圆形范围内所有敌人的命中（按敌人中心判断）"""
+        self.area_intents.append(AreaIntent(HitIntent(None, damage, **options), center=(x, y), radius=radius))
+
+    def expand_areas(self, enemies):
+        # 范围意图展开成对每个敌人的命中意图
+        for area in self.area_intents:
+            if area.rect is not None:
+                targets = enemies.query_rect(area.rect)
+            else:
+                targets = enemies.query_radius(area.center[0], area.center[1], area.radius)
+            template = area.template
+            for enemy in targets:
+                intent = HitIntent(enemy, template.damage)
+                for field in HitIntent.__slots__:
+                    if field not in ("target", "damage"):
+                        setattr(intent, field, getattr(template, field))
+                self.intents.append(intent)
+        self.area_intents = []
+
+    def dedupe(self):
+        """同一来源的同一种攻击每帧对同一目标只保留伤害最高的一次，并按固定顺序排列"""
+        best = {}
+        for intent in self.intents:
+            if intent.tag is None:
+                key = (id(intent.target), id(intent))
+            else:
+                key = (id(intent.target), id(intent.source), intent.tag)
+            current = best.get(key)
+            if current is None or intent.damage > current.damage:
+                best[key] = intent
+        # 按注册序号排序，结算顺序不依赖登记顺序和内存地址（护盾会吸收先结算的伤害）
+        return sorted(best.values(), key=lambda intent: (intent.target.registry_order, -intent.damage, str(intent.tag)))
+
+    def resolve(self, world, player, enemies, particles):
+        """结算本帧登记的全部命中意图"""
+        self.events = []
+        self.expand_areas(enemies)
+        intents = self.dedupe()
+        self.intents = []
+
+        player_protected = player.is_invincible()
+        for intent in intents:
+            target = intent.target
+            if target is player:
+                if player_protected:
+                    continue
+                self.apply_to_player(intent, player)
+            else:
+                if not target.alive:
+                    continue
+                self.apply_to_enemy(intent, target, particles)
+
+            if intent.forest_damage > 0:
+                world.forest_health = max(0, world.forest_health - intent.forest_damage)
+            if intent.particle_count > 0:
+                x, y = intent.particle_at if intent.particle_at is not None else target.rect.center
+                particles.add_particles(x, y, intent.color, count=intent.particle_count,
+                                        **(intent.particle_options or {}))
+
+    def apply_to_player(self, intent, player):
+        player.health -= intent.damage
+        if random.random() < intent.hit_chance:
+            player.hit_cooldown = intent.hit_cooldown
+            self.events.append(("player_hit", player))
+        if intent.velocity_x is not None:
+            player.velocity_x = intent.velocity_x
+        if intent.velocity_y is not None:
+            player.velocity_y = intent.velocity_y
+
+    def apply_to_enemy(self, intent, enemy, particles):
+        was_alive = enemy.health > 0
+        if intent.slow is not None:
+            enemy.apply_slow(*intent.slow)
+        if intent.lethal:
+            enemy.health = 0
+        elif intent.damage > 0:
+            # BOSS护盾激活时由take_damage先扣护盾
+            if enemy.shield_active:
+                enemy.take_damage(intent.damage, particles)
+            else:
+                enemy.health -= intent.damage
+        if random.random() < intent.hit_chance:
+            enemy.hit = True
+            enemy.hit_cooldown = intent.hit_cooldown
+        if intent.velocity_y is not None:
+            enemy.velocity_y = intent.velocity_y
+        if was_alive and enemy.health <= 0:
+            self.events.append(("enemy_killed", enemy))
+
+
+# 全局战斗结算器，攻击方登记意图，由Game每帧结算一次
+combat_resolver = CombatResolver()
@@ -62,6 +62,11 @@ class EnemyType(Enum):
     FLAMETHROWER = 3
     BOSS = 4
 
+# 危险区域作用对象
+class HazardTarget(Enum):
+    PLAYER = 0
+    ENEMY = 1
+
 # 字体初始化
 # 字体初始化 - 修改为更可靠的中文字体方案
 try:
@@ -98,3 +103,36 @@ KEY_PAUSE = pygame.K_ESCAPE
 
 # 游戏关卡常量
 MAX_LEVELS = 9  # 3章节, 每章3关
+
+# 敌人AI细节层次(LOD)调度 - 距离以摄像机中心为准（像素）
+AI_LOD_BANDS = [(900, 1), (1400, 2), (1800, 4)]  # (距离上限, 每隔多少帧更新一次)
+AI_LOD_FAR_INTERVAL = 8  # 超出所有距离档位时的更新间隔
+AI_SLEEP_DISTANCE = 1800  # 超过此距离且落地闲置的敌人进入休眠
+AI_WAKE_DISTANCE = 1500  # 摄像机靠近到此距离内时唤醒休眠敌人
+ENEMY_ACTIVATION_DISTANCE = 1400  # 关卡敌人在摄像机水平距离内才真正创建
+BOSS_MAX_MINIONS = 6  # 每个BOSS同时存活的召唤小怪上限
+SPATIAL_HASH_CELL_SIZE = 100  # 实体空间哈希的格子大小（像素）
+FLOWER_TRAP_DURATION = 180  # 莉娅花朵陷阱留在地面上的时间（帧）
+POLLUTION_CLOUD_DURATION = 240  # BOSS污染云持续时间（帧）
+POLLUTION_CLOUD_TICK = 30  # 污染云每隔多少帧造成一次伤害
+PROJECTILE_CAPACITY = 512  # 同时存在的投射物上限
+FIREBALL_SPEED = 8  # 火焰喷射器火球的飞行速度（像素/帧）
+ENEMY_JUMP_STRENGTH = 14  # 敌人追踪时的起跳初速度
+ENEMY_JUMP_REACH = 3  # 敌人一次跳跃最多越过的水平格数
+BOSS_PLAN_INTERVAL = 30  # BOSS每隔多少帧向后台规划线程提交一次快照
+BOSS_PLAN_LATENCY = 2  # 提交快照后第几帧取回计划（还没算完时等待，取回时机与线程调度无关）
+CROWD_SEPARATION_SPACING = 1.0  # 两个敌人中心保持的水平距离，按两者半宽之和的倍数计算
+CROWD_SEPARATION_STRENGTH = 2  # 每帧最多推开的像素数
+STATUS_EFFECT_CAPACITY = 1024  # 同时生效的减速/增益效果上限
+ECS_ENABLED = False  # 是否把玩家、敌人和收集品的数据放进数组存储，由系统函数批量更新
+ECS_CAPACITY = 2048  # 数组存储的实体槽位上限
+COLLECTIBLE_MAGNETIC_RANGE = 80  # 收集品被玩家吸引的距离（像素）
+COLLECTIBLE_ANIMATION_FRAMES = 16  # 收集品图集中每种收集品预渲染的脉冲动画帧数
+PROGRESS_FILE = "progress.db"  # 存档文件名（收集统计、成就、关卡解锁和设置）
+PROGRESS_DIR = "ForestGuardian"  # 存档所在的用户数据目录名
+PROGRESS_SAVE_INTERVAL = 1.0  # 后台线程合并存档写入的间隔（秒）
+PROGRESS_AUTOSAVE_FRAMES = 1800  # 游戏中每隔多少帧自动保存一次
+TEXT_CACHE_BUDGET = 4 * 1024 * 1024  # 文字渲染缓存的内存上限（字节）
+HUD_GLYPHS = "0123456789.%/:- abcdefghijklmnopqrstuvwxyz森林健康总收集金币分数进度附近品最普通不常见稀有史诗传说AI更新休眠"  # 启动时预先栅格化的HUD字符
+ENEMY_NAV_WIDTH = 112  # 导航图按此宽度检查敌人身体是否放得下（像素）
+ENEMY_NAV_HEIGHT = 64  # 导航图按此高度检查敌人头顶空间（像素）
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from constants import *
+
+
+class CrowdSeparation:
+    """敌人群体分离 - 通过每帧重建的空间索引查找邻居，把挤在一起的敌人水平推开，开销与敌人数量成线性关系"""
+
+    def __init__(self, spacing=CROWD_SEPARATION_SPACING, strength=CROWD_SEPARATION_STRENGTH):
+        self.spacing = spacing  # 分离距离 = 两者半宽之和 * spacing，与敌人的精灵大小匹配
+        self.strength = strength  # 每帧最多推开的像素数
+
+    def separation_push(self, enemy, neighbours):
+        # 邻居越近推力越大，只在水平方向推开（平台游戏中竖直方向交给重力）
+        push = 0
+        for other in neighbours:
+            if other is enemy:
+                continue
+            radius = (enemy.rect.width + other.rect.width) / 2 * self.spacing
+            dx = enemy.rect.centerx - other.rect.centerx
+            distance = abs(dx)
+            if distance >= radius:
+                continue
+            if dx == 0:
+                # 完全重叠时按注册序号决定方向，保证两个敌人朝相反方向分开
+                side = 1 if enemy.registry_order > other.registry_order else -1
+            else:
+                side = 1 if dx > 0 else -1
+            push += side * (1 - distance / radius)
+        return push
+
+    def apply(self, enemies, world):
+        """对注册表中的敌人做一次分离，需要在空间索引重建之后调用；移动过的敌人同步更新索引"""
+        moves = []
+        for enemy in enemies:
+            if not enemy.alive or enemy.sleeping or enemy.separation_weight == 0:
+                continue
+            # 候选邻居：与自己的矩形（按spacing放宽后）重叠的敌人
+            reach = max(0, int(enemy.rect.width * (self.spacing - 1)))
+            neighbours = enemies.query_rect(enemy.rect.inflate(reach * 2, 0))
+            if len(neighbours) < 2:
+                continue
+            push = self.separation_push(enemy, neighbours)
+            if push != 0:
+                step = max(-self.strength, min(self.strength, push * self.strength)) * enemy.separation_weight
+                step = int(round(step))
+                if step != 0:
+                    moves.append((enemy, step))
+
+        # 先算完所有推力再移动，结果与遍历顺序无关
+        for enemy, step in moves:
+            if self.can_move(enemy, step, world):
+                old_rect = enemy.rect.copy()
+                enemy.rect.x += step
+                enemies.update_index(enemy, old_rect)
+
+    def can_move(self, enemy, step, world):
+        """目标位置不能撞进瓦片；站在地面上的敌人推开后脚下仍要有地面，不会被推下平台"""
+        rect = enemy.rect
+        if world.is_area_solid(rect.x + step, rect.y, rect.width, rect.height):
+            return False
+        return not enemy.is_grounded() or world.is_area_solid(rect.x + step, rect.bottom, rect.width, 1)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from constants import *
+
+# 实体种类（0表示空槽位）
+KIND_PLAYER = 1
+KIND_ENEMY = 2
+
+# 存储中的数组列：(列名, 类型码)
+COLUMNS = (
+    ('velocity_x', 'd'),
+    ('velocity_y', 'd'),
+    ('health', 'd'),
+    ('max_health', 'd'),
+    ('hit_cooldown', 'i'),
+    ('attack_cooldown', 'i'),
+    ('alive', 'b'),
+)
+
+
+class Component:
+    """组件描述符 - 实体登记到存储后读写存储中的数组，未登记时读写实例上的后备属性
+    （使用__slots__的类需要在槽位中声明后备属性名 backing_name(属性名)）"""
+
+    def __init__(self, column=None):
+        self.column = column
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.backing = backing_name(name)
+        if self.column is None:
+            self.column = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        store = obj.ecs_store
+        if store is None:
+            try:
+                return getattr(obj, self.backing)
+            except AttributeError:
+                raise AttributeError(self.name)
+        value = store.columns[self.column][obj.ecs_slot]
+        return bool(value) if self.column == 'alive' else value
+
+    def __set__(self, obj, value):
+        store = obj.ecs_store
+        if store is None:
+            setattr(obj, self.backing, value)
+        else:
+            store.columns[self.column][obj.ecs_slot] = value
+
+
+def backing_name(name):
+    """组件未登记到存储时保存数值的属性名"""
+    return '_component_' + name
+
+
+def components(*names):
+    """类装饰器：ECS_ENABLED打开时把列出的属性装成Component描述符；
+    关闭时类保持不变，这些属性仍是普通实例属性，默认路径没有描述符的开销"""
+    def install(cls):
+        if ECS_ENABLED:
+            for name in names:
+                component = Component()
+                component.__set_name__(cls, name)
+                setattr(cls, name, component)
+        return cls
+    return install
+
+
+class EntityStore:
+    """实体组件存储 - 速度、生命值和冷却时间按槽位存放在类型化数组中，
+    系统函数直接遍历数组；原有的角色、敌人对象作为槽位的视图保留"""
+
+    def __init__(self, capacity=ECS_CAPACITY):
+        self.capacity = capacity
+        self.columns = {}
+        for name, typecode in COLUMNS:
+            column = array(typecode, bytes(array(typecode).itemsize * capacity))
+            self.columns[name] = column
+            setattr(self, name, column)
+        self.kinds = bytearray(capacity)
+        self.views = [None] * capacity
+
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.high_water = 0  # 用过的最大槽位+1，系统只遍历到这里
+
+    def active_count(self):
+        return self.capacity - len(self.free_slots)
+
+    def attach(self, entity, kind):
+        """把实体的组件数据搬进数组，实体之后通过Component读写数组；槽位用完时返回False"""
+        if entity.ecs_store is not None:
+            return True
+        if not self.free_slots:
+            return False
+        slot = self.free_slots.pop()
+        self.high_water = max(self.high_water, slot + 1)
+
+        values = {}
+        for component in components_of(type(entity)):
+            if hasattr(entity, component.backing):
+                values[component.column] = getattr(entity, component.backing)
+        entity.ecs_store = self
+        entity.ecs_slot = slot
+        for name, _ in COLUMNS:
+            self.columns[name][slot] = 0
+        for column, value in values.items():
+            self.columns[column][slot] = value
+        self.kinds[slot] = kind
+        self.views[slot] = entity
+        return True
+
+    def detach(self, entity):
+        """把组件数据写回实例属性并释放槽位"""
+        if entity.ecs_store is not self:
+            return
+        slot = entity.ecs_slot
+        values = [(component.backing, component.__get__(entity)) for component in components_of(type(entity))]
+        entity.ecs_store = None
+        entity.ecs_slot = -1
+        for backing, value in values:
+            setattr(entity, backing, value)
+
+        self.kinds[slot] = 0
+        self.views[slot] = None
+        self.free_slots.append(slot)
+
+    def clear(self):
+        """切换关卡时释放所有槽位，仍被引用的视图恢复为普通对象"""
+        for slot in range(self.high_water):
+            if self.views[slot] is not None:
+                self.detach(self.views[slot])
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        self.high_water = 0
+
+
+def components_of(cls):
+    """类上声明的所有组件描述符（子类重新声明的同名组件覆盖父类的）"""
+    components = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if isinstance(value, Component):
+                components[name] = value
+    return list(components.values())
+
+
+def cooldown_system(store):
+    """所有存活实体的受伤/攻击冷却各减一帧"""
+    kinds = store.kinds
+    alive = store.alive
+    hit_cooldown = store.hit_cooldown
+    attack_cooldown = store.attack_cooldown
+    for slot in range(store.high_water):
+        if kinds[slot] == 0 or not alive[slot]:
+            continue
+        if hit_cooldown[slot] > 0:
+            hit_cooldown[slot] -= 1
+        if attack_cooldown[slot] > 0:
+            attack_cooldown[slot] -= 1
+
+
+def enemy_physics(store, slot, world, player):
+    """敌人物理：按数组中的速度应用重力、竖直碰撞和位移，规则与逐个对象更新时完全相同；
+    在敌人更新中原来的物理位置调用，本帧后面的攻击和投射物用的是移动后的位置"""
+    rect = store.views[slot].rect
+    velocity_y = store.velocity_y[slot] + GRAVITY
+    dy, velocity_y = world.resolve_vertical(rect, velocity_y, velocity_y)
+    store.velocity_y[slot] = velocity_y
+    # 和逐个对象更新时一样通过矩形赋值取整，位置结果逐帧一致
+    rect.x += store.velocity_x[slot]
+    rect.y += dy
+
+    # 掉出世界边界时由视图选择重生位置
+    if rect.y > world.world_height or rect.y < -500:
+        store.views[slot].reset_to_spawn_point(world, player)
+
+
+# 全局实体存储，ECS_ENABLED打开时由Game登记玩家和敌人
+entity_store = EntityStore()
@@ -1,10 +1,17 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import bisect
+
 import pygame
 import random
 import math
 from constants import *
+from hit_shapes import HitRing, HitColumns, HitCone, test_targets
+from hazards import HazardZone
+from status_effects import effect_engine, SLOW
+from combat import combat_resolver
+from ecs import components, enemy_physics
 
 
 def create_enemy(x, y, enemy_type, scale):
@@ -23,21 +30,130 @@ def create_enemy(x, y, enemy_type, scale):
         return Enemy(x, y, enemy_type, scale)
 
 
+class EnemyPool:
+    """敌人对象池 - 回收死亡的敌人对象，生成同类型敌人时优先复用"""
+
+    def __init__(self):
+        self.free = {}  # (敌人类型, 缩放) -> 可复用的敌人列表
+
+    def acquire(self, x, y, enemy_type, scale):
+        """获取一个敌人，有同类型的回收对象时直接重置复用"""
+        key = (enemy_type, scale)
+        bucket = self.free.get(key)
+        if bucket:
+            enemy = bucket.pop()
+            enemy.reset_state(x, y)
+            return enemy
+
+        enemy = create_enemy(x, y, enemy_type, scale)
+        enemy.pool_key = key
+        return enemy
+
+    def release(self, enemy):
+        """回收一个死亡的敌人"""
+        if enemy.pool_key is not None:
+            effect_engine.cancel_entity(enemy)
+            # 回收后不再属于原来的BOSS，被别的BOSS复用时不会算进两个BOSS的小怪上限
+            enemy.owner = None
+            self.free.setdefault(enemy.pool_key, []).append(enemy)
+
+    def clear(self):
+        """切换关卡时丢弃所有回收的对象"""
+        self.free = {}
+
+    def free_count(self):
+        return sum(len(bucket) for bucket in self.free.values())
+
+
+class EnemySpawnRecord:
+    """敌人生成记录 - 只保存创建敌人所需的信息，靠近时才生成真正的Enemy"""
+    __slots__ = ("x", "y", "enemy_type", "scale", "overrides")
+
+    def __init__(self, x, y, enemy_type, scale, overrides=None):
+        self.x = x
+        self.y = y
+        self.enemy_type = enemy_type
+        self.scale = scale
+        self.overrides = overrides  # 创建后需要覆盖的属性，例如BOSS的血量
+
+    def spawn(self):
+        enemy = create_enemy(self.x, self.y, self.enemy_type, self.scale)
+        if self.overrides:
+            for name, value in self.overrides.items():
+                setattr(enemy, name, value)
+        return enemy
+
+
+class EnemyPopulation:
+    """关卡敌人群体 - 生成记录按x坐标排序，摄像机靠近时才激活为敌人对象"""
+
+    def __init__(self, activation_distance=ENEMY_ACTIVATION_DISTANCE):
+        self.activation_distance = activation_distance
+        self.records = []
+        self.record_xs = []  # 与records一一对应的x坐标，用于二分查找
+
+    def clear(self):
+        self.records = []
+        self.record_xs = []
+
+    def add(self, x, y, enemy_type, scale, overrides=None):
+        """添加一条生成记录"""
+        record = EnemySpawnRecord(x, y, enemy_type, scale, overrides)
+        index = bisect.bisect_right(self.record_xs, x)
+        self.record_xs.insert(index, x)
+        self.records.insert(index, record)
+        return record
+
+    def pending_count(self):
+        """尚未激活的敌人数量"""
+        return len(self.records)
+
+    def activate_nearby(self, focus_x):
+        """激活水平距离在激活范围内的记录，返回新创建的敌人列表"""
+        if not self.records:
+            return []
+
+        start = bisect.bisect_left(self.record_xs, focus_x - self.activation_distance)
+        end = bisect.bisect_right(self.record_xs, focus_x + self.activation_distance)
+        if start == end:
+            return []
+
+        batch = self.records[start:end]
+        del self.records[start:end]
+        del self.record_xs[start:end]
+        return [record.spawn() for record in batch]
+
+
+# 开启ECS时，登记到实体存储后以下属性读写存储中的数组
+@components('velocity_x', 'velocity_y', 'health', 'max_health', 'hit_cooldown', 'attack_cooldown', 'alive')
 class Enemy(pygame.sprite.Sprite):
+    lod_enabled = True  # 是否允许按距离降频/休眠
+    separation_weight = 1.0  # 被同伴推开的程度，0表示不会被推动
+    registry_order = -1  # 在实体注册表中的注册序号
+    ecs_store = None
+    ecs_slot = -1
+
     def __init__(self, x, y, enemy_type, scale):
         pygame.sprite.Sprite.__init__(self)
         self.enemy_type = enemy_type
         self.scale = scale
-        self.direction = random.choice([-1, 1])  # 随机初始方向
-        self.flip = self.direction == -1
-        self.move_counter = 0
-        self.idle_counter = 0
-        self.moving = True
+        self.pool_key = None  # 由对象池创建时记录的回收分类
+        self.owner = None  # 召唤这个小怪的BOSS
 
         # 根据敌人类型加载图像
         self.image = self.load_image(f"enemy_{enemy_type}", scale)
         self.rect = self.image.get_rect()
+
+        self.reset_state(x, y)
+
+    def reset_state(self, x, y):
+        """重置敌人的运行状态（对象池复用时调用，不会重新绘制图像）"""
         self.rect.center = (x, y)
+        self.direction = random.choice([-1, 1])  # 随机初始方向
+        self.flip = self.direction == -1
+        self.move_counter = 0
+        self.idle_counter = 0
+        self.moving = True
 
         # 属性设置
         self.speed = random.uniform(5, 10)
@@ -48,12 +164,16 @@ class Enemy(pygame.sprite.Sprite):
         self.hit = False
         self.hit_cooldown = 0
         self.attack_cooldown = 0
+        self.velocity_x = 0
         self.velocity_y = 0
-        # 减速效果变量
-        self.original_speed = None  # 存储原始速度
-        self.slow_duration = 0      # 减速持续时间
         self.shield_active = False
 
+        # AI细节层次调度（由EnemyUpdateScheduler维护）
+        self.lod_step = 1  # 本次更新代表的帧数，远处敌人降频时大于1
+        self.lod_last_tick = None  # 上一次实际更新时的调度帧号
+        self.lod_phase = None  # 错峰更新的相位
+        self.sleeping = False  # 是否处于休眠状态
+
     def load_image(self, name, scale=1):
 
         # 像素大小
@@ -370,15 +490,40 @@ class Enemy(pygame.sprite.Sprite):
         dy = 0
 
         if self.alive:
+            # 寻找玩家（先确定方向，再按方向移动）
+            player_dist = math.sqrt((player.rect.centerx - self.rect.centerx) ** 2 +
+                                    (player.rect.centery - self.rect.centery) ** 2)
+            # 只有能看到玩家（中间没有地形遮挡）时才追逐和攻击
+            can_see_player = player_dist < 500 and world.has_line_of_sight(self.rect.center, player.rect.center)
+            following_path = False
+            if can_see_player and random.random() < 0.90:  # 60%几率追逐玩家
+                # 沿共享流场追踪，可以绕过缺口、跳上平台；流场不可达时直接朝玩家移动
+                next_step = world.navigation.sample(self.rect.centerx, self.rect.bottom)
+                if next_step is not None:
+                    following_path = True
+                    self.direction, need_jump = next_step
+                    if need_jump and self.is_grounded():
+                        self.velocity_y = -ENEMY_JUMP_STRENGTH
+                elif player.rect.centerx < self.rect.centerx:
+                    self.direction = -1
+                else:
+                    self.direction = 1
+                self.flip = self.direction == -1
+
             # AI行为
             if self.moving:
-                dx = self.direction * self.speed
+                dx = self.direction * self.speed * self.lod_step
                 self.move_counter += 1
 
+                blocked = world.is_area_solid(self.rect.x + dx, self.rect.y, self.rect.width, self.rect.height)
+                if following_path:
+                    # 沿流场前进时遇到台阶不转身，挡住时停下并起跳越过
+                    if blocked:
+                        dx = 0
+                        if self.is_grounded():
+                            self.velocity_y = -ENEMY_JUMP_STRENGTH
                 # 检测边缘或障碍物，转向
-                if self.move_counter > random.randint(100, 200) or world.tile_collide(self.rect.x + dx, self.rect.y,
-                                                                                      self.rect.width,
-                                                                                      self.rect.height):
+                elif self.move_counter > random.randint(100, 200) or blocked:
                     self.direction *= -1
                     self.flip = not self.flip
                     self.move_counter = 0
@@ -389,74 +534,65 @@ class Enemy(pygame.sprite.Sprite):
                 if self.idle_counter <= 0:
                     self.moving = True
 
-            # 寻找玩家
-            player_dist = math.sqrt((player.rect.centerx - self.rect.centerx) ** 2 +
-                                    (player.rect.centery - self.rect.centery) ** 2)
-            if player_dist < 500 and random.random() < 0.90:  # 60%几率追逐玩家
-                if player.rect.centerx < self.rect.centerx:
-                    self.direction = -1
-                    self.flip = True
-                else:
-                    self.direction = 1
-                    self.flip = False
-
-            # 应用重力
-            self.velocity_y += GRAVITY
-            dy += self.velocity_y
-
-            # 检查与世界的碰撞
-            for tile in world.tile_list:
-                # 水平碰撞
-                # if tile[1].colliderect(self.rect.x + dx, self.rect.y, self.rect.width, self.rect.height):
-                #     dx = 0
-                #     self.direction *= -1  # 改变方向
-                #     self.flip = not self.flip
-
-                # 垂直碰撞
-                if tile[1].colliderect(self.rect.x, self.rect.y + dy, self.rect.width, self.rect.height):
-                    if self.velocity_y < 0:  # 跳跃时碰到天花板
-                        dy = tile[1].bottom - self.rect.top
-                        self.velocity_y = 0
-                    elif self.velocity_y >= 0:  # 下落时碰到地面
-                        dy = tile[1].top - self.rect.bottom
-                        self.velocity_y = 0
-
-            # 更新位置
-            self.rect.x += dx
-            self.rect.y += dy
-
-            # 检查是否掉出世界边界
-            if self.rect.y > world.world_height or self.rect.y < -500:
-                # 敌人掉出世界，重置到适当位置
-                self.reset_to_spawn_point(world, player)
+            if self.ecs_store is None:
+                # 应用重力
+                self.velocity_y += GRAVITY
+                dy += self.velocity_y
+
+                # 检查与世界的竖直碰撞（水平方向由上面的转向逻辑处理）
+                dy, self.velocity_y = world.resolve_vertical(self.rect, dy, self.velocity_y)
+
+                # 更新位置
+                self.rect.x += dx
+                self.rect.y += dy
+
+                # 检查是否掉出世界边界
+                if self.rect.y > world.world_height or self.rect.y < -500:
+                    # 敌人掉出世界，重置到适当位置
+                    self.reset_to_spawn_point(world, player)
+            else:
+                # 重力、碰撞和位移读写数组存储中的速度和位置，规则与上面相同
+                self.velocity_x = dx
+                enemy_physics(self.ecs_store, self.ecs_slot, world, player)
 
             # 攻击玩家
-            if player_dist < 50 and self.attack_cooldown == 0 and not player.is_invincible():
-                player.health -= self.strength
-                player.hit = True
-                player.hit_cooldown = 10
+            if player_dist < 50 and can_see_player and self.attack_cooldown == 0 and not player.is_invincible():
+                combat_resolver.queue_hit(player, self.strength, source=self, tag="melee", hit_cooldown=10,
+                                          color=RED, particle_count=15)
                 self.attack_cooldown = 60  # 1秒冷却
-                particles.add_particles(player.rect.centerx, player.rect.centery, RED, count=15)
 
-            # 更新冷却时间
-            if self.attack_cooldown > 0:
-                self.attack_cooldown -= 1
+            # 更新冷却时间（登记到数组存储时由cooldown_system处理）
+            if self.ecs_store is None:
+                if self.attack_cooldown > 0:
+                    self.attack_cooldown -= 1
 
-            if self.hit_cooldown > 0:
-                self.hit_cooldown -= 1
+                if self.hit_cooldown > 0:
+                    self.hit_cooldown -= 1
 
             # 检查生命值
             if self.health <= 0:
                 self.alive = False
                 particles.add_particles(self.rect.centerx, self.rect.centery, RED, count=40, size=8)
 
-            # 处理减速效果计时
-            if self.slow_duration > 0:
-                self.slow_duration -= 1
-                # 如果减速时间结束，恢复原始速度
-                if self.slow_duration == 0 and self.original_speed is not None:
-                    self.speed = self.original_speed
-                    self.original_speed = None
+    def is_grounded(self):
+        # 站在地面上时每帧的垂直速度都会被碰撞归零
+        return self.velocity_y == 0
+
+    def advance_timers(self, frames):
+        """补算被调度器跳过的帧数内的计时器，使降频/休眠后的状态与逐帧更新一致"""
+        if frames <= 0:
+            return
+
+        if self.moving:
+            self.move_counter += frames
+        else:
+            self.idle_counter -= frames
+            if self.idle_counter <= 0:
+                self.moving = True
+
+        if self.ecs_store is None:
+            self.attack_cooldown = max(0, self.attack_cooldown - frames)
+            self.hit_cooldown = max(0, self.hit_cooldown - frames)
 
     # 添加重置到初始位置的方法
     def reset_to_spawn_point(self, world, player):
@@ -517,20 +653,17 @@ class Enemy(pygame.sprite.Sprite):
     # 新增方法：应用减速效果
 
     def apply_slow(self, slow_factor, duration):
-        # 如果尚未被减速或减速效果已经结束
-        if self.original_speed is None:
-            self.original_speed = self.speed
-            self.speed *= slow_factor
-            self.slow_duration = duration
-        # 如果已经处于减速状态，只更新持续时间（不叠加减速效果）
-        else:
-            self.slow_duration = max(self.slow_duration, duration)
+        # 减速由状态效果引擎计时和恢复；已经处于减速状态时只延长持续时间（不叠加减速效果）
+        effect_engine.apply(self, SLOW, slow_factor, duration)
 
 
 class LumberJack(Enemy):
     """伐木工敌人类型"""
     def __init__(self, x, y, scale=1):
         super().__init__(x, y, EnemyType.LOGGER.value, scale)
+
+    def reset_state(self, x, y):
+        super().reset_state(x, y)
         self.health = 40
         self.max_health = 40
         self.strength = 8
@@ -540,6 +673,9 @@ class Polluter(Enemy):
     """污染者敌人类型"""
     def __init__(self, x, y, scale=1):
         super().__init__(x, y, EnemyType.POLLUTER.value, scale)
+
+    def reset_state(self, x, y):
+        super().reset_state(x, y)
         self.health = 30
         self.max_health = 30
         self.strength = 5
@@ -559,22 +695,26 @@ class Polluter(Enemy):
                 # 范围伤害检测
                 player_dist = math.sqrt((player.rect.centerx - self.rect.centerx)**2 +
                                       (player.rect.centery - self.rect.centery)**2)
-                if player_dist <= self.pollution_range and not player.is_invincible():
-                    player.health -= 3
-                    player.hit = True
-                    player.hit_cooldown = 5
-
-                    # 影响森林健康度
-                    world.forest_health -= 1
-                    if world.forest_health < 0:
-                        world.forest_health = 0
-
-                    particles.add_particles(self.rect.centerx, self.rect.centery, PURPLE, count=30, speed=1, life=60)
+                if player_dist <= self.pollution_range:
+                    # 命中时同时影响森林健康度
+                    combat_resolver.queue_hit(player, 3, source=self, tag="pollution", hit_cooldown=5,
+                                              forest_damage=1, color=PURPLE, particle_count=30,
+                                              particle_at=self.rect.center,
+                                              particle_options={'speed': 1, 'life': 60})
+
+    def advance_timers(self, frames):
+        super().advance_timers(frames)
+        if frames > 0:
+            # 远离玩家时释放的污染打不到玩家，只需保持计时节奏
+            self.pollution_timer = (self.pollution_timer + frames) % self.pollution_interval
 
 class LoggingMachine(Enemy):
     """机械伐木机敌人类型"""
     def __init__(self, x, y, scale=1.5):
         super().__init__(x, y, EnemyType.MACHINE.value, scale)
+
+    def reset_state(self, x, y):
+        super().reset_state(x, y)
         self.health = 100
         self.max_health = 100
         self.strength = 15
@@ -589,28 +729,25 @@ class LoggingMachine(Enemy):
             player_dist = math.sqrt((player.rect.centerx - self.rect.centerx)**2 +
                                   (player.rect.centery - self.rect.centery)**2)
             if player_dist < self.attack_range and self.attack_cooldown == 0 and not player.is_invincible():
-                player.health -= self.strength
-                player.hit = True
-                player.hit_cooldown = 15
-                self.attack_cooldown = 90  # 1.5秒冷却
-                particles.add_particles(player.rect.centerx, player.rect.centery, RED, count=25, size=6)
-
                 # 对森林造成额外伤害
-                world.forest_health -= 2
-                if world.forest_health < 0:
-                    world.forest_health = 0
+                combat_resolver.queue_hit(player, self.strength, source=self, tag="machine", hit_cooldown=15,
+                                          forest_damage=2, color=RED, particle_count=25,
+                                          particle_options={'size': 6})
+                self.attack_cooldown = 90  # 1.5秒冷却
 
 class FireThrower(Enemy):
     """火焰喷射器敌人类型"""
     def __init__(self, x, y, scale=1):
         super().__init__(x, y, EnemyType.FLAMETHROWER.value, scale)
+
+    def reset_state(self, x, y):
+        super().reset_state(x, y)
         self.health = 35
         self.max_health = 35
         self.strength = 7
         self.speed = random.uniform(3.6, 5.4)
         self.fire_range = 150
         self.fire_timer = 0
-        self.burn_effect = []  # 存储被点燃的区域
 
     def update(self, world, player, particles):
         super().update(world, player, particles)
@@ -628,48 +765,37 @@ class FireThrower(Enemy):
                 for i in range(5):
                     fire_pos = (fire_x + (fire_direction * i * 20), self.rect.centery)
                     particles.add_particles(fire_pos[0], fire_pos[1], (255, 140, 0), count=15, life=90)
-                    self.burn_effect.append((fire_pos, 120))  # 位置和持续时间
-
-                # 检测玩家是否在火焰范围内
-                player_in_range = (fire_direction == 1 and player.rect.centerx > self.rect.centerx and
-                                 player.rect.centerx < self.rect.centerx + self.fire_range) or \
-                                (fire_direction == -1 and player.rect.centerx < self.rect.centerx and
-                                 player.rect.centerx > self.rect.centerx - self.fire_range)
-
-                if player_in_range and abs(player.rect.centery - self.rect.centery) < 50 and not player.is_invincible():
-                    player.health -= 12
-                    player.hit = True
-                    player.hit_cooldown = 10
-
-                    # 持续燃烧效果
-                    world.forest_health -= 3
-                    if world.forest_health < 0:
-                        world.forest_health = 0
-
-            # 更新燃烧效果
-            new_burn_effect = []
-            for pos, time in self.burn_effect:
-                time -= 1
-                if time > 0:
-                    new_burn_effect.append((pos, time))
-                    if random.random() < 0.1:  # 10%几率产生火焰粒子
-                        particles.add_particles(pos[0], pos[1], (255, 140, 0), count=3, life=30)
-
-                    # 检测玩家是否在燃烧区域
-                    if abs(player.rect.centerx - pos[0]) < 20 and abs(player.rect.centery - pos[1]) < 40 and not player.is_invincible():
-                        player.health -= 0.5
-                        if random.random() < 0.05:  # 低几率触发受伤效果
-                            player.hit = True
-                            player.hit_cooldown = 3
-
-            self.burn_effect = new_burn_effect
+                    # 被点燃的区域，玩家站在里面持续掉血，低几率触发受伤效果
+                    burn_rect = pygame.Rect(fire_pos[0] - 20, fire_pos[1] - 40, 40, 80)
+                    world.hazards.add_zone(HazardZone(burn_rect, HazardTarget.PLAYER, owner=self, damage=0.5,
+                                                      hit_chance=0.05, hit_cooldown=3,
+                                                      color=(255, 140, 0), particle_chance=0.1), 120)
+
+                # 发射火球，命中玩家时还会烧伤森林；被地形挡住时不发射
+                # 火球从偏离中心30像素处出发，飞行帧数向上取整，使火球中心最远到达原来的火焰范围（距敌人中心fire_range）；
+                # 竖直容差（50像素）也与原来相同
+                if world.has_line_of_sight(self.rect.center, player.rect.center):
+                    life = math.ceil((self.fire_range - abs(fire_x - self.rect.centerx)) / FIREBALL_SPEED)
+                    world.projectiles.fire(fire_x, self.rect.centery, fire_direction * FIREBALL_SPEED, 0,
+                                           HazardTarget.PLAYER, 12, life,
+                                           radius=8, color=(255, 140, 0), forest_damage=3, reach_y=50)
+
+    def advance_timers(self, frames):
+        super().advance_timers(frames)
+        if frames > 0:
+            self.fire_timer = (self.fire_timer + frames) % 180
 
 
 class GreedyMerchant(Enemy):
     """贪婪商人BOSS类型，游戏最终BOSS"""
+    lod_enabled = False  # BOSS的召唤和特殊攻击计时需要逐帧推进
+    separation_weight = 0  # BOSS体型大，不会被小怪挤开
 
     def __init__(self, x, y, scale=2.0):
         super().__init__(x, y, EnemyType.BOSS.value, scale)
+
+    def reset_state(self, x, y):
+        super().reset_state(x, y)
         self.health = 300
         self.max_health = 300
         self.strength = 25
@@ -701,6 +827,16 @@ class GreedyMerchant(Enemy):
         self.shield_cooldown = 0
         self.should_spawn_minions = False
 
+        # 召唤的小怪及同时存活上限
+        self.minions = []
+        self.max_minions = BOSS_MAX_MINIONS
+
+        # 后台规划线程给出的行动计划，还没有计划时按原来的随机方式行动
+        self.plan = None
+        self.plan_timer = 0
+        self.plan_key = None  # 由AIPlanner分配的请求编号
+        self.plan_wait = 0  # 距离取回已提交计划还剩的帧数
+
     def update(self, world, player, particles):
         # 如果进入了下一阶段
         if self.phase == 1 and self.health <= self.max_health * self.phase_threshold:
@@ -752,6 +888,10 @@ class GreedyMerchant(Enemy):
                 self.velocity_y = self.jump_height
                 self.is_jumping = True
                 self.jump_cooldown = 90  # 1.5秒冷却
+            elif self.plan is not None:
+                # 按计划调整站位
+                self.direction = self.plan.move_direction
+                self.flip = self.direction == -1
             else:
                 self.direction *= -1
                 self.flip = not self.flip
@@ -763,47 +903,45 @@ class GreedyMerchant(Enemy):
     def prepare_special_attack(self):
         self.is_preparing_special = True
         self.preparation_time = 60  # 1秒准备时间
-        self.attack_type = random.randint(0, 3)  # 随机选择攻击类型
+        if self.plan is not None:
+            self.attack_type = self.plan.attack_type
+        else:
+            self.attack_type = random.randint(0, 3)  # 随机选择攻击类型
 
     def execute_special_attack(self, world, player, particles):
         # 根据攻击类型执行不同的特殊攻击
         if self.attack_type == 0:  # 普通冲击波
-            self.shockwave_attack(player, particles)
+            self.shockwave_attack(world, player, particles)
         elif self.attack_type == 1:  # 污染攻击
             self.pollution_attack(world, player, particles)
         elif self.attack_type == 2:  # 火焰攻击
-            self.flame_attack(player, particles)
+            self.flame_attack(world, player, particles)
         elif self.attack_type == 3:  # 机械攻击
             self.machine_attack(world, player, particles)
 
-    def shockwave_attack(self, player, particles):
+    def shockwave_attack(self, world, player, particles):
         # 向两侧释放冲击波
         power = 18
         range_limit = 200
-
-        # 计算与玩家的距离
-        player_dist = math.sqrt((player.rect.centerx - self.rect.centerx) ** 2 +
-                                (player.rect.centery - self.rect.centery) ** 2)
+        wave = HitRing(self.rect.centerx, self.rect.centery, range_limit)
 
         # 如果玩家在范围内，造成伤害并击退
-        if player_dist <= range_limit and not player.is_invincible():
+        for target, _ in test_targets(wave, [player]):
+            # 冲击波会被地形挡住
+            if not world.has_line_of_sight(self.rect.center, target.rect.center):
+                continue
             # 计算击退方向
-            dx = player.rect.centerx - self.rect.centerx
-            dy = player.rect.centery - self.rect.centery
+            dx = target.rect.centerx - self.rect.centerx
+            dy = target.rect.centery - self.rect.centery
 
             # 标准化方向向量
             length = max(1, math.sqrt(dx * dx + dy * dy))
             dx /= length
             dy /= length
 
-            # 施加击退力
-            player.velocity_x = dx * power
-            player.velocity_y = dy * power * 0.5 - 3  # 稍微向上的力
-
-            # 造成伤害
-            player.health -= self.strength * 0.7
-            player.hit = True
-            player.hit_cooldown = 15
+            # 造成伤害并施加击退力（稍微向上）
+            combat_resolver.queue_hit(target, self.strength * 0.7, source=self, tag="shockwave", hit_cooldown=15,
+                                      velocity_x=dx * power, velocity_y=dy * power * 0.5 - 3)
 
         # 创建冲击波视觉效果
         for angle in range(0, 360, 15):
@@ -816,21 +954,21 @@ class GreedyMerchant(Enemy):
     def pollution_attack(self, world, player, particles):
         # 范围污染攻击，类似污染者但更强大
         pollution_range = 180
-
-        # 计算与玩家的距离
-        player_dist = math.sqrt((player.rect.centerx - self.rect.centerx) ** 2 +
-                                (player.rect.centery - self.rect.centery) ** 2)
+        cloud = HitRing(self.rect.centerx, self.rect.centery, pollution_range)
 
         # 如果玩家在范围内受到伤害
-        if player_dist <= pollution_range and not player.is_invincible():
-            player.health -= self.strength * 0.5
-            player.hit = True
-            player.hit_cooldown = 10
-
-            # 影响森林健康度
-            world.forest_health -= 3
-            if world.forest_health < 0:
-                world.forest_health = 0
+        for target, _ in test_targets(cloud, [player]):
+            # 同时影响森林健康度
+            combat_resolver.queue_hit(target, self.strength * 0.5, source=self, tag="pollution",
+                                      hit_cooldown=10, forest_damage=3)
+
+        # 留下持续一段时间的污染云，玩家停留在云中会持续受到伤害
+        cloud_radius = pollution_range // 2
+        cloud_rect = pygame.Rect(0, 0, cloud_radius * 2, cloud_radius * 2)
+        cloud_rect.center = self.rect.center
+        world.hazards.add_zone(HazardZone(cloud_rect, HazardTarget.PLAYER, owner=self, damage=self.strength * 0.1,
+                                          tick_interval=POLLUTION_CLOUD_TICK, hit_cooldown=10, radius=cloud_radius,
+                                          color=PURPLE, particle_chance=0.3), POLLUTION_CLOUD_DURATION)
 
         # 创建持续的污染云效果
         for _ in range(20):
@@ -841,7 +979,7 @@ class GreedyMerchant(Enemy):
             particles.add_particles(self.rect.centerx + x_offset, self.rect.centery + y_offset,
                                     PURPLE, count=2, speed=0.5, life=120, size=4)
 
-    def flame_attack(self, player, particles):
+    def flame_attack(self, world, player, particles):
         # 多方向火焰喷射攻击
         flame_range = 220
         flame_damage = self.strength * 0.6
@@ -853,29 +991,21 @@ class GreedyMerchant(Enemy):
         base_angle = math.atan2(player.rect.centery - self.rect.centery,
                                 player.rect.centerx - self.rect.centerx)
 
-        # 发射多条火焰
-        for i in range(flame_directions):
-            # 计算每条火焰的角度
-            if flame_directions > 1:
-                angle_spread = math.pi / 4  # 45度扇形范围
-                current_angle = base_angle - (angle_spread / 2) + (angle_spread / (flame_directions - 1)) * i
-            else:
-                current_angle = base_angle
-
-            # 逐步创建火焰粒子
-            for dist in range(20, int(flame_range), 20):
-                flame_x = self.rect.centerx + math.cos(current_angle) * dist
-                flame_y = self.rect.centery + math.sin(current_angle) * dist
+        # 45度扇形范围内的多条火焰，每隔20像素一个火焰点
+        cone = HitCone(self.rect.centerx, self.rect.centery, base_angle, math.pi / 4,
+                       flame_directions, 20, flame_range, 30)
+        # 每条火焰遇到地形就停下
+        cone.limit_rays(lambda cos_a, sin_a: world.first_solid_along(self.rect.centerx, self.rect.centery,
+                                                                     cos_a, sin_a, flame_range))
 
-                # 添加火焰粒子
-                particles.add_particles(flame_x, flame_y, ORANGE, count=5, speed=1, life=40, size=6)
+        # 添加火焰粒子
+        for flame_x, flame_y, _ in cone.sample_points():
+            particles.add_particles(flame_x, flame_y, ORANGE, count=5, speed=1, life=40, size=6)
 
-                # 检测玩家是否在火焰路径上
-                if math.sqrt((player.rect.centerx - flame_x) ** 2 + (player.rect.centery - flame_y) ** 2) < 30:
-                    if not player.is_invincible():
-                        player.health -= flame_damage / (dist / 50)  # 距离远伤害降低
-                        player.hit = True
-                        player.hit_cooldown = 5
+        # 每个命中目标的火焰点造成一次伤害，距离远伤害降低
+        for target, distances in test_targets(cone, [player]):
+            damage = sum(flame_damage / (dist / 50) for dist in distances)
+            combat_resolver.queue_hit(target, damage, source=self, tag="flame", hit_cooldown=5)
 
     def machine_attack(self, world, player, particles):
         # 机械打击，类似伐木机但更强力
@@ -891,28 +1021,20 @@ class GreedyMerchant(Enemy):
             offset = random.randint(-200, 200)
             drop_positions.append(player.rect.centerx + offset)
 
-        # 对每个打击点创建效果和检测伤害
-        for drop_x in drop_positions:
-            # 创建警告效果
+        columns = HitColumns(drop_positions, 50)
+
+        # 检测目标被几根打击柱命中，每根都造成一次伤害
+        for target, hit_columns in test_targets(columns, [player]):
+            # 向上击飞，并对森林造成伤害
+            combat_resolver.queue_hit(target, machine_damage * len(hit_columns), source=self, tag="machine",
+                                      hit_cooldown=15, velocity_y=-10, forest_damage=2 * len(hit_columns))
+
+        # 对每个打击点创建警告和打击效果
+        for drop_x in columns.xs:
             for y in range(0, 300, 30):
                 warning_y = self.rect.centery - y
                 particles.add_particles(drop_x, warning_y, RED, count=1, speed=0, life=30, size=8)
 
-            # 检测玩家是否在打击范围内
-            if abs(player.rect.centerx - drop_x) < 50 and not player.is_invincible():
-                player.health -= machine_damage
-                player.hit = True
-                player.hit_cooldown = 15
-
-                # 击退效果
-                player.velocity_y = -10  # 向上击飞
-
-                # 对森林造成伤害
-                world.forest_health -= 2
-                if world.forest_health < 0:
-                    world.forest_health = 0
-
-            # 创建打击效果
             for _ in range(15):
                 offset_x = random.randint(-30, 30)
                 offset_y = random.randint(-10, 200)
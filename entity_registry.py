@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from spatial_hash import SpatialHash
+
+
+class EntityRegistry:
+    """实体注册表 - 只保留存活实体，按类型分桶，并在每帧的安全点压缩掉死亡实体"""
+
+    def __init__(self):
+        self.entities = []  # 上次压缩后仍然存活的实体（本帧内死亡的实体要到下次压缩才移除）
+        self.buckets = {}  # 实体类型 -> 该类型的实体列表
+        self.live_counts = {}  # 实体类型 -> 存活数量
+        self.live_count = 0
+        self.spatial_index = SpatialHash()  # 每帧重建的存活实体空间索引
+        self.next_order = 0  # 注册序号，给需要稳定顺序的逻辑（如战斗结算）使用
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def clear(self):
+        self.entities = []
+        self.buckets = {}
+        self.live_counts = {}
+        self.live_count = 0
+        self.spatial_index.clear()
+
+    def add(self, entity):
+        """注册一个实体"""
+        entity_type = type(entity)
+        entity.registry_order = self.next_order
+        self.next_order += 1
+        self.entities.append(entity)
+        self.buckets.setdefault(entity_type, []).append(entity)
+        if entity.alive:
+            self.live_counts[entity_type] = self.live_counts.get(entity_type, 0) + 1
+            self.live_count += 1
+
+    def extend(self, entities):
+        for entity in entities:
+            self.add(entity)
+
+    def of_type(self, entity_type):
+        """获取某一类型的实体列表（不包含子类）"""
+        return self.buckets.get(entity_type, [])
+
+    def count(self, entity_type=None):
+        """获取上次压缩时的存活数量"""
+        if entity_type is None:
+            return self.live_count
+        return self.live_counts.get(entity_type, 0)
+
+    def all_dead(self):
+        """所有实体是否都已死亡（以上次压缩的结果为准）"""
+        return self.live_count == 0
+
+    def compact(self, on_removed=None):
+        """移除死亡实体并重新统计存活数量，on_removed会收到每个被移除的实体"""
+        if all(entity.alive for entity in self.entities):
+            return 0
+
+        removed = 0
+        live_entities = []
+        for entity in self.entities:
+            if entity.alive:
+                live_entities.append(entity)
+            else:
+                removed += 1
+                if on_removed is not None:
+                    on_removed(entity)
+
+        self.entities = live_entities
+        self.buckets = {}
+        self.live_counts = {}
+        for entity in live_entities:
+            entity_type = type(entity)
+            self.buckets.setdefault(entity_type, []).append(entity)
+            self.live_counts[entity_type] = self.live_counts.get(entity_type, 0) + 1
+        self.live_count = len(live_entities)
+        return removed
+
+    def rebuild_index(self):
+        """根据实体当前位置重建空间索引"""
+        self.spatial_index.rebuild(entity for entity in self.entities if entity.alive)
+
+    def update_index(self, entity, old_rect):
+        """两次重建之间移动了实体时，把它在空间索引中从旧矩形的格子移到当前矩形的格子"""
+        self.spatial_index.remove(entity, old_rect)
+        self.spatial_index.insert(entity)
+
+    def query_rect(self, rect):
+        """返回与矩形重叠的存活实体（基于最近一次重建的索引）"""
+        return [entity for entity in self.spatial_index.query_rect(rect) if entity.alive]
+
+    def query_radius(self, x, y, radius):
+        """返回中心在半径范围内的存活实体（基于最近一次重建的索引）"""
+        return [entity for entity in self.spatial_index.query_radius(x, y, radius) if entity.alive]
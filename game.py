@@ -10,15 +10,25 @@ from enum import Enum
 from collectibles_system import CollectibleManager
 from constants import *
 from characters import Lia, Karn, CharacterType
-from enemies import create_enemy, GreedyMerchant
+from enemies import GreedyMerchant, EnemyPool, EnemyPopulation
 from world import World
 from ui import GameUI, MainMenuUI, CharacterSelectUI, PauseMenuUI, GameOverUI, VictoryUI, CutsceneUI, TutorialUI, \
     SettingsUI, LevelSelectUI
 from particles import ParticleSystem
+from ai_scheduler import EnemyUpdateScheduler
+from ai_planner import AIPlanner
+from crowd import CrowdSeparation
+from status_effects import effect_engine
+from combat import combat_resolver
+from achievements import achievement_tracker, KILL, LEVEL_CLEAR
+from ecs import entity_store, cooldown_system, KIND_PLAYER, KIND_ENEMY
+from entity_registry import EntityRegistry
+from progress_store import ProgressStore
+from text_cache import text_cache, glyph_atlas
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, progress_path=None):
         # 初始化 Pygame
         pygame.init()
         pygame.mixer.init()
@@ -32,6 +42,8 @@ class Game:
         self.font_small = font_small
         self.font_medium = font_medium
         self.font_large = font_large
+        # HUD中数值经常变化的文字由字形图集拼接
+        glyph_atlas.build(self.font_small, HUD_GLYPHS)
 
         # 游戏状态
         self.state = GameState.MAIN_MENU
@@ -51,7 +63,12 @@ class Game:
         self.player = None
         self.player_character_type = None
         self.world = None
-        self.enemies = []
+        self.enemies = EntityRegistry()  # 存活敌人注册表
+        self.enemy_scheduler = EnemyUpdateScheduler()  # 按距离调度敌人更新
+        self.enemy_population = EnemyPopulation()  # 尚未激活的关卡敌人生成记录
+        self.enemy_pool = EnemyPool()  # BOSS召唤小怪的对象池
+        self.ai_planner = AIPlanner()  # BOSS行动计划的后台规划线程
+        self.crowd_separation = CrowdSeparation()  # 防止敌人挤在同一位置
         self.particle_system = ParticleSystem()
         self.game_ui = None
         self.level = 1
@@ -86,6 +103,44 @@ class Game:
         self.collectible_manager = CollectibleManager()
         self.score_factor = 1
 
+        # 存档 - 启动时读取，游戏中定期和关键时刻保存
+        self.progress_store = ProgressStore(progress_path)
+        self.unlocked_level = 1
+        self.autosave_timer = PROGRESS_AUTOSAVE_FRAMES
+        self.load_progress()
+
+    def load_progress(self):
+        """读取存档：收集统计、成就进度、已解锁关卡和设置"""
+        store = self.progress_store
+        self.collectible_manager.load_stats(store.get('collection_stats', {}))
+        achievement_tracker.load_progress(store.get('achievements', {}))
+        # 没有存档记录（新玩家）时只解锁第一关，之后每通过一关解锁下一关
+        self.unlocked_level = store.get('unlocked_level', 1)
+        self.level_select_ui.set_unlocked_level(self.unlocked_level)
+
+        settings = store.get('settings')
+        if settings is not None:
+            self.settings_ui = SettingsUI()
+            self.settings_ui.load_settings(settings)
+            self.set_music_volume(self.settings_ui.music_volume)
+            self.set_sound_volume(self.settings_ui.sound_volume)
+
+    def save_progress(self):
+        """保存进度（只登记到存档，由后台线程写入磁盘）"""
+        self.autosave_timer = PROGRESS_AUTOSAVE_FRAMES
+        store = self.progress_store
+        store.save('collection_stats', self.collectible_manager.export_stats())
+        store.save('achievements', achievement_tracker.export_progress())
+        store.save('unlocked_level', self.unlocked_level)
+
+    def quit_game(self):
+        """保存进度并等待写入完成后退出"""
+        self.save_progress()
+        self.progress_store.close()
+        self.ai_planner.shutdown()
+        pygame.quit()
+        sys.exit()
+
     def load_background(self, level=None):
         """加载背景图片，如果没有指定关卡则加载默认背景"""
         if level is None:
@@ -235,7 +290,13 @@ class Game:
 
     def create_level(self, level):
         # 清空现有的敌人
-        self.enemies = []
+        self.enemies.clear()
+        self.ai_planner.reset()
+        effect_engine.clear()
+        combat_resolver.clear()
+        entity_store.clear()
+        self.enemy_population.clear()
+        self.enemy_pool.clear()
 
         # 创建世界
         self.world = World(level)
@@ -252,6 +313,8 @@ class Game:
 
         # 设置角色的世界引用
         self.player.world = self.world
+        if ECS_ENABLED:
+            entity_store.attach(self.player, KIND_PLAYER)
 
         # 创建游戏UI
         self.game_ui = GameUI(self.player)
@@ -260,55 +323,97 @@ class Game:
         self.create_enemies(level)
 
         # 生成关卡收集品
-        self.collectible_manager.spawn_level_collectibles(level, self.world.world_width)
+        self.collectible_manager.spawn_level_collectibles(level, self.world.world_width, self.world)
 
         # 初始化屏幕滚动
         self.scroll = [0, 0]
 
+        # 激活出生点附近的敌人
+        self.activate_nearby_enemies()
+        self.enemies.rebuild_index()
+
     def create_enemies(self, level):
-        # 根据关卡创建不同的敌人
+        # 根据关卡生成敌人记录，摄像机靠近时才真正创建敌人
         if level == 1:
             # 第一关：几个简单的敌人
             for i in range(5):
                 x = random.randint(500, self.world.world_width - 100)
                 y = 300
                 enemy_type = random.randint(0, 1)  # 0：伐木工，1：污染者
-                self.enemies.append(create_enemy(x, y, enemy_type, 1.0))
+                self.enemy_population.add(x, y, enemy_type, 1.0)
         elif level == 2:
             # 第二关：更多更强的敌人
             for i in range(8):
                 x = random.randint(500, self.world.world_width - 100)
                 y = 300
                 enemy_type = random.randint(0, 2)  # 0：伐木工，1：污染者，2：伐木机
-                self.enemies.append(create_enemy(x, y, enemy_type, 1.0))
+                self.enemy_population.add(x, y, enemy_type, 1.0)
         elif level == 3:
             # 第三关：BOSS关
-            boss = create_enemy(800, 300, 4, 2.0)  # 贪婪商人
-            self.enemies.append(boss)
+            self.enemy_population.add(800, 300, 4, 2.0)  # 贪婪商人
 
             # 再添加几个小怪
             for i in range(3):
                 x = random.randint(500, self.world.world_width - 100)
                 y = 300
                 enemy_type = random.randint(2, 3)  # 2：伐木机，3：火焰喷射器
-                self.enemies.append(create_enemy(x, y, enemy_type, 1.0))
+                self.enemy_population.add(x, y, enemy_type, 1.0)
 
         else:
             for i in range(level//3):
-                boss = create_enemy(random.randint(self.world.world_width//2 + 100, self.world.world_width - 100), 300, 4, 2.0)  # 贪婪商人
-                boss.health = random.randint(300, 500)
-                boss.max_health = boss.health
-
-                boss.shield_health = random.randint(100, 300)
-                boss.shield_max_health = boss.shield_health
-                boss.strength = 20
-                self.enemies.append(boss)
+                boss_x = random.randint(self.world.world_width//2 + 100, self.world.world_width - 100)
+                boss_health = random.randint(300, 500)
+                shield_health = random.randint(100, 300)
+                self.enemy_population.add(boss_x, 300, 4, 2.0, {  # 贪婪商人
+                    'health': boss_health,
+                    'max_health': boss_health,
+                    'shield_health': shield_health,
+                    'shield_max_health': shield_health,
+                    'strength': 20
+                })
             for i in range(level):
                 x = random.randint(500, self.world.world_width - 100)
                 y = 300
                 enemy_type = random.randint(0, 3)  # 0：伐木工，1：污染者，2：伐木机，3：火焰喷射器
-                self.enemies.append(create_enemy(x, y, enemy_type, 1.0))
-
+                self.enemy_population.add(x, y, enemy_type, 1.0)
+
+    def activate_nearby_enemies(self):
+        # 将摄像机附近的敌人记录激活为真正的敌人
+        focus_x = self.scroll[0] + SCREEN_WIDTH // 2
+        self.register_enemies(self.enemy_population.activate_nearby(focus_x))
+
+    def register_enemies(self, enemies):
+        # 加入敌人注册表，开启ECS时同时登记到实体存储
+        for enemy in enemies:
+            if ECS_ENABLED:
+                entity_store.attach(enemy, KIND_ENEMY)
+            self.enemies.add(enemy)
+
+    def release_enemy(self, enemy):
+        # 压缩注册表时移除的敌人：退出实体存储，池化的小怪放回对象池
+        entity_store.detach(enemy)
+        self.enemy_pool.release(enemy)
+
+
+    def spawn_boss_minions(self, boss):
+        # 在上限内从对象池生成新的小怪（死亡的小怪在压缩注册表时已回收）
+        # 只统计仍然属于这个BOSS的小怪（回收后被其他BOSS复用的对象不算）
+        boss.minions = [minion for minion in boss.minions if minion.alive and minion.owner is boss]
+
+        count = min(random.randint(2, 4), boss.max_minions - len(boss.minions))
+        # 有计划时按计划的位置和类型召唤，否则在BOSS附近随机召唤
+        planned_spawns = boss.plan.minion_spawns if boss.plan is not None else []
+        for index in range(count):
+            if index < len(planned_spawns):
+                x, enemy_type = planned_spawns[index]
+            else:
+                x = boss.rect.centerx + random.randint(-100, 100)
+                enemy_type = random.randint(0, 3)  # 0：伐木工，1：污染者，2：伐木机，3：火焰喷射器
+            y = 300
+            minion = self.enemy_pool.acquire(x, y, enemy_type, 1.0)
+            minion.owner = boss
+            boss.minions.append(minion)
+            self.register_enemies([minion])
 
     def update_scroll(self):
         # 计算目标滚动位置 - 让玩家保持在屏幕中心
@@ -337,17 +442,17 @@ class Game:
         #     self.scroll[1] = max_scroll_y
 
     def check_level_complete(self):
-        # 检查关卡是否完成
-        all_enemies_dead = True
-        for enemy in self.enemies:
-            if enemy.alive:
-                all_enemies_dead = False
-                break
+        # 检查关卡是否完成（还有未激活的敌人时不算完成）
+        all_enemies_dead = self.enemy_population.pending_count() == 0 and self.enemies.all_dead()
 
         if all_enemies_dead:
+            achievement_tracker.emit(LEVEL_CLEAR, level=self.level, character=self.player_character_type)
             if self.level < self.max_level:
                 # 进入下一关
                 self.level += 1
+                self.unlocked_level = max(self.unlocked_level, self.level)
+                self.level_select_ui.set_unlocked_level(self.unlocked_level)
+                self.save_progress()
                 self.create_level(self.level)
                 # 播放关卡完成音效
                 self.play_sound("level_complete")
@@ -355,6 +460,7 @@ class Game:
                 # 通关游戏
                 self.state = GameState.VICTORY
                 self.victory_ui = VictoryUI()
+                self.save_progress()
                 # 播放胜利音乐
                 self.play_music("victory")
 
@@ -364,6 +470,7 @@ class Game:
             self.player.alive = False
             self.state = GameState.GAME_OVER
             self.game_over_ui = GameOverUI()
+            self.save_progress()
             # 播放游戏结束音乐
             self.play_music("game_over")
 
@@ -373,8 +480,7 @@ class Game:
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                self.quit_game()
 
             # 根据游戏状态处理不同的事件
             if self.state == GameState.MAIN_MENU:
@@ -434,8 +540,7 @@ class Game:
                 self.play_sound("menu_select")
             elif self.main_menu_ui.buttons[3].is_clicked(mouse_pos, event):  # 退出
                 self.play_sound("menu_select")
-                pygame.quit()
-                sys.exit()
+                self.quit_game()
 
     def handle_character_select_events(self, event, mouse_pos):
         # 处理角色选择事件
@@ -490,7 +595,7 @@ class Game:
             if event.key == pygame.K_3:
                 skill_used = False
                 if self.player.character_type == CharacterType.LIA:
-                    skill_used = self.player.skill_3(self.enemies, self.particle_system, self.score_factor)
+                    skill_used = self.player.skill_3(self.world, self.enemies, self.particle_system, self.score_factor)
                 else:
                     skill_used = self.player.skill_3(self.particle_system, self.score_factor)
                 if skill_used:
@@ -543,7 +648,7 @@ class Game:
                             self.player.skill_2(self.particle_system)
                     elif skill_num == 3:
                         if self.player.character_type == CharacterType.LIA:
-                            self.player.skill_3(self.enemies, self.particle_system)
+                            self.player.skill_3(self.world, self.enemies, self.particle_system)
                         else:
                             self.player.skill_3(self.particle_system)
                     self.play_sound("skill")
@@ -559,10 +664,10 @@ class Game:
                 self.resume_music()  # 恢复音乐
             elif result == "main_menu":
                 self.state = GameState.MAIN_MENU
+                self.save_progress()
                 self.play_music("main_menu")
             elif result == "quit":
-                pygame.quit()
-                sys.exit()
+                self.quit_game()
 
     def handle_game_over_events(self, event, mouse_pos):
         # 处理游戏结束事件
@@ -635,6 +740,7 @@ class Game:
         # 应用音量设置
         self.set_music_volume(self.settings_ui.music_volume)
         self.set_sound_volume(self.settings_ui.sound_volume)
+        self.progress_store.save('settings', self.settings_ui.get_settings())
 
         # 这里可以添加其他设置的应用逻辑
         print(f"设置已应用: 音乐音量={int(self.music_volume * 100)}%, 音效音量={int(self.sound_volume * 100)}%")
@@ -648,24 +754,55 @@ class Game:
             # 更新粒子系统
             particles_to_draw = list(self.particle_system.update())
 
+            # 结束到期的减速、增益等状态效果
+            effect_engine.update()
+            if ECS_ENABLED:
+                cooldown_system(entity_store)
+
             # 更新玩家
             self.player.move(self.moving_left, self.moving_right, self.world, self.enemies, self.particle_system, self.dev_mode, self.score_factor)
             self.player.update_animation()
 
-            # 更新敌人
+            # 更新敌人 - 先激活摄像机附近的敌人记录并刷新追踪流场，远处的敌人由调度器降频或休眠
+            self.activate_nearby_enemies()
+            self.world.navigation.update_target(self.player)
+            self.enemy_scheduler.begin_frame(self.scroll)
             for enemy in self.enemies:
                 if enemy.alive:
                     # enemy.move(self.world, self.player, self.particle_system)
                     # enemy.update_animation()
-                    enemy.update(self.world, self.player, self.particle_system, )
-                    if isinstance(enemy, GreedyMerchant):
-                        if enemy.should_spawn_minions is True:
-                            for _ in range(random.randint(2, 4)):
-                                x = enemy.rect.centerx + random.randint(-100, 100)
-                                y = 300
-                                enemy_type = random.randint(0, 3)  # 0：伐木工，1：污染者，2：伐木机，3：火焰喷射器
-                                self.enemies.append(create_enemy(x, y, enemy_type, 1.0))
-                            enemy.should_spawn_minions = False
+                    self.enemy_scheduler.update_enemy(enemy, self.world, self.player, self.particle_system)
+
+            # 安全点：压缩掉本帧死亡的敌人，池化的小怪放回对象池
+            self.enemies.compact(self.release_enemy)
+
+            # 遍历结束后再生成BOSS召唤的小怪，同时向后台规划线程同步BOSS的计划
+            for boss in self.enemies.of_type(GreedyMerchant):
+                self.ai_planner.update_boss(boss, self.player, self.world)
+                if boss.should_spawn_minions is True:
+                    boss.should_spawn_minions = False
+                    self.spawn_boss_minions(boss)
+
+            # 敌人位置更新完毕后重建空间索引，供下一帧的攻击和技能查询
+            self.enemies.rebuild_index()
+
+            # 通过空间索引查找邻居，把挤在一起的敌人推开（被推开的敌人同步更新索引，后面的查询用的是新位置）
+            self.crowd_separation.apply(self.enemies, self.world)
+
+            # 更新危险区域（燃烧区、陷阱、污染云）
+            self.world.hazards.update(self.player, self.enemies, self.particle_system)
+
+            # 更新投射物
+            self.world.projectiles.update(self.world, self.player, self.enemies, self.particle_system)
+
+            # 统一结算本帧登记的所有命中（玩家攻击、技能、敌人攻击、危险区域、投射物）
+            combat_resolver.resolve(self.world, self.player, self.enemies, self.particle_system)
+            player_hurt = False
+            for event, target in combat_resolver.events:
+                if event == "player_hit":
+                    player_hurt = True
+                elif event == "enemy_killed":
+                    achievement_tracker.emit(KILL, enemy_type=target.enemy_type)
 
             # 更新收集品 - 记录收集前的数量
             prev_collected = self.collectible_manager.collection_stats['total_collected']
@@ -677,7 +814,8 @@ class Game:
                 # 播放收集音效（如果有的话）
                 self.play_sound("menu_select")  # 临时使用菜单选择音效
 
-            if self.player.hit:
+            # 受伤音效：战斗结算的受伤事件，或角色掉出世界时自己设置的hit
+            if player_hurt or self.player.hit:
                 self.play_sound("hurt")
                 self.player.hit = False
             # 更新屏幕滚动
@@ -688,6 +826,11 @@ class Game:
 
             # 检查关卡是否完成
             self.check_level_complete()
+
+            # 定期自动保存
+            self.autosave_timer -= 1
+            if self.autosave_timer <= 0:
+                self.save_progress()
             # 如果开发者模式开启，给玩家补满生命和魔法
             if self.dev_mode:
                 self.player.health = self.player.max_health
@@ -723,6 +866,9 @@ class Game:
                 if enemy.alive:
                     enemy.draw(self.screen, self.scroll)
 
+            # 绘制投射物
+            self.world.projectiles.draw(self.screen, self.scroll)
+
             # 绘制收集品
             self.collectible_manager.draw(self.screen, self.scroll)
 
@@ -741,10 +887,17 @@ class Game:
 
             # 显示开发者模式提示
             if self.dev_mode:
-                dev_text = self.font_medium.render("开发者模式: 已启用", True, (255, 255, 0))
+                dev_text = text_cache.render(self.font_medium, "开发者模式: 已启用", True, (255, 255, 0))
                 self.screen.blit(dev_text, (SCREEN_WIDTH // 4 * 3 - dev_text.get_width() - 10, 10))
+                # 敌人调度统计：本帧实际更新和保持休眠的敌人数
+                scheduler_text = glyph_atlas.render(self.font_small,
+                                                    f"AI更新: {self.enemy_scheduler.updated_count} "
+                                                    f"休眠: {self.enemy_scheduler.sleeping_count}",
+                                                    True, (255, 255, 0))
+                self.screen.blit(scheduler_text, (SCREEN_WIDTH // 4 * 3 - scheduler_text.get_width() - 10,
+                                                  15 + dev_text.get_height()))
             elif self.dev_mode_message_timer > 0:
-                dev_text = self.font_medium.render("开发者模式: 已禁用", True, (255, 255, 0))
+                dev_text = text_cache.render(self.font_medium, "开发者模式: 已禁用", True, (255, 255, 0))
                 self.screen.blit(dev_text, (SCREEN_WIDTH // 4 * 3 - dev_text.get_width() - 10, 10))
 
             # 绘制UI - 传递收集管理器
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import heapq
+import math
+import random
+import pygame
+from constants import *
+from spatial_hash import SpatialHash
+from combat import combat_resolver
+
+
+class HazardZone:
+    """危险区域 - 燃烧区、陷阱、污染云等持续一段时间的区域效果"""
+
+    def __init__(self, rect, target, owner=None, damage=0, tick_interval=1,
+                 slow_factor=None, slow_duration=0, hit_chance=1.0, hit_cooldown=0,
+                 radius=None, color=None, particle_chance=0):
+        self.rect = rect
+        self.target = target  # HazardTarget，区域只影响玩家或只影响敌人
+        self.owner = owner  # 创建者，不会受到自己区域的影响
+        self.damage = damage  # 每次生效造成的伤害
+        self.tick_interval = tick_interval  # 每隔多少帧生效一次
+        self.slow_factor = slow_factor  # 减速倍率，None表示不减速
+        self.slow_duration = slow_duration
+        self.hit_chance = hit_chance  # 造成伤害时触发受伤效果的几率
+        self.hit_cooldown = hit_cooldown
+        self.radius = radius  # 不为None时为圆形区域，圆心为rect中心
+        self.color = color
+        self.particle_chance = particle_chance  # 每帧产生粒子的几率
+        self.created_at = 0
+        self.expires_at = None  # None表示永久存在
+        self.active = True
+
+    def contains(self, x, y):
+        if not self.rect.collidepoint(x, y):
+            return False
+        if self.radius is None:
+            return True
+        dx = x - self.rect.centerx
+        dy = y - self.rect.centery
+        return dx * dx + dy * dy <= self.radius * self.radius
+
+    def apply(self, entity):
+        """对区域内的实体生效一次（登记到战斗结算，减速区域不触发受伤效果）"""
+        slow = (self.slow_factor, self.slow_duration) if self.slow_factor is not None else None
+        hit_chance = self.hit_chance if self.damage > 0 else 0
+        combat_resolver.queue_hit(entity, self.damage, source=self, tag="hazard", hit_chance=hit_chance,
+                                  hit_cooldown=self.hit_cooldown, slow=slow)
+
+    def emit_particles(self, particles):
+        if self.radius is None:
+            x, y = self.rect.center
+        else:
+            angle = random.uniform(0, 2 * math.pi)
+            distance = random.uniform(0, self.radius)
+            x = self.rect.centerx + math.cos(angle) * distance
+            y = self.rect.centery + math.sin(angle) * distance
+        particles.add_particles(x, y, self.color, count=3, life=30)
+
+
+class HazardManager:
+    """危险区域管理器 - 区域按作用对象登记在空间索引中，按到期时间排队移除，每个实体每帧只做一次索引查询"""
+
+    def __init__(self):
+        self.frame = 0
+        self.zones = []
+        self.indexes = {HazardTarget.PLAYER: SpatialHash(), HazardTarget.ENEMY: SpatialHash()}
+        self.zone_counts = {HazardTarget.PLAYER: 0, HazardTarget.ENEMY: 0}
+        self.expiry_queue = []  # (到期帧, 序号, 区域) 小顶堆
+        self.next_sequence = 0
+
+    def clear(self):
+        self.zones = []
+        for index in self.indexes.values():
+            index.clear()
+        for target in self.zone_counts:
+            self.zone_counts[target] = 0
+        self.expiry_queue = []
+
+    def add_zone(self, zone, duration=None):
+        """登记一个危险区域，duration为持续帧数，None表示永久存在"""
+        zone.created_at = self.frame
+        if duration is not None:
+            zone.expires_at = self.frame + duration
+            heapq.heappush(self.expiry_queue, (zone.expires_at, self.next_sequence, zone))
+            self.next_sequence += 1
+        self.zones.append(zone)
+        self.indexes[zone.target].insert(zone)
+        self.zone_counts[zone.target] += 1
+        return zone
+
+    def remove_zone(self, zone):
+        """提前移除区域（到期队列中的记录在出队时跳过）"""
+        if not zone.active:
+            return
+        zone.active = False
+        self.indexes[zone.target].remove(zone)
+        self.zone_counts[zone.target] -= 1
+        self.zones = [item for item in self.zones if item.active]
+
+    def zones_at(self, x, y, target):
+        """获取包含某点、作用于指定对象的区域"""
+        if self.zone_counts[target] == 0:
+            return []
+        point = pygame.Rect(int(x), int(y), 1, 1)
+        return [zone for zone in self.indexes[target].query_rect(point) if zone.contains(x, y)]
+
+    def expire_zones(self):
+        # 只检查堆顶，未到期的区域不会被遍历
+        expired = False
+        while self.expiry_queue and self.expiry_queue[0][0] <= self.frame:
+            _, _, zone = heapq.heappop(self.expiry_queue)
+            if zone.active:
+                zone.active = False
+                self.indexes[zone.target].remove(zone)
+                self.zone_counts[zone.target] -= 1
+                expired = True
+        if expired:
+            self.zones = [zone for zone in self.zones if zone.active]
+
+    def apply_to(self, entity, target):
+        for zone in self.zones_at(entity.rect.centerx, entity.rect.centery, target):
+            if zone.owner is entity:
+                continue
+            if (self.frame - zone.created_at) % zone.tick_interval == 0:
+                zone.apply(entity)
+
+    def update(self, player, enemies, particles):
+        self.frame += 1
+        self.expire_zones()
+
+        for zone in self.zones:
+            if zone.particle_chance > 0 and random.random() < zone.particle_chance:
+                zone.emit_particles(particles)
+
+        # 玩家处于无敌状态时不受区域影响
+        if self.zone_counts[HazardTarget.PLAYER] > 0 and not player.is_invincible():
+            self.apply_to(player, HazardTarget.PLAYER)
+
+        if self.zone_counts[HazardTarget.ENEMY] > 0:
+            for enemy in enemies:
+                if enemy.alive:
+                    self.apply_to(enemy, HazardTarget.ENEMY)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import bisect
+import math
+
+
+class HitRing:
+    """环形/圆形范围 - 目标中心到圆心的距离在[inner, outer]之间即命中"""
+
+    def __init__(self, x, y, outer, inner=0):
+        self.x = x
+        self.y = y
+        self.outer = outer
+        self.inner = inner
+
+    def hit_samples(self, x, y):
+        """返回命中信息列表：命中时为[距离]，未命中为空列表"""
+        dist_sq = (x - self.x) ** 2 + (y - self.y) ** 2
+        if self.inner * self.inner <= dist_sq <= self.outer * self.outer:
+            return [math.sqrt(dist_sq)]
+        return []
+
+
+class HitColumns:
+    """竖直打击柱 - 一组x坐标，目标中心与某根柱子的水平距离小于half_width即被该柱命中"""
+
+    def __init__(self, xs, half_width):
+        self.xs = list(xs)  # 保留原始顺序用于生成特效
+        self.sorted_xs = sorted(self.xs)
+        self.half_width = half_width
+
+    def hit_samples(self, x, y):
+        """返回命中目标的柱子x坐标列表（二分查找，与柱子数量无关）"""
+        start = bisect.bisect_right(self.sorted_xs, x - self.half_width)
+        end = bisect.bisect_left(self.sorted_xs, x + self.half_width)
+        return self.sorted_xs[start:end]
+
+
+class HitCone:
+    """扇形喷射 - 从原点沿多条射线按固定间隔分布火焰点，目标距离某个火焰点小于radius即被命中一次"""
+
+    def __init__(self, x, y, base_angle, spread, rays, step, max_range, radius):
+        self.x = x
+        self.y = y
+        self.step = step
+        self.radius = radius
+        # 火焰点所在的距离：step, 2*step, ... (< max_range)
+        self.first_index = 1
+        self.last_index = (int(max_range) - 1) // step
+
+        # 每条射线的方向只计算一次
+        if rays > 1:
+            angles = [base_angle - spread / 2 + spread / (rays - 1) * i for i in range(rays)]
+        else:
+            angles = [base_angle]
+        self.directions = [(math.cos(angle), math.sin(angle)) for angle in angles]
+        self.last_indices = [self.last_index] * len(self.directions)  # 每条射线最远的火焰点序号
+
+    def limit_rays(self, probe):
+        """用probe(cos, sin)返回的遮挡距离截短每条射线，probe返回None表示没有遮挡"""
+        for ray, (cos_a, sin_a) in enumerate(self.directions):
+            blocked = probe(cos_a, sin_a)
+            if blocked is not None:
+                # 只保留距离小于遮挡距离的火焰点
+                self.last_indices[ray] = min(self.last_index, math.ceil(blocked / self.step) - 1)
+
+    def sample_points(self):
+        """按射线顺序返回所有火焰点 (x, y, 距离)，用于生成特效"""
+        for (cos_a, sin_a), last_index in zip(self.directions, self.last_indices):
+            for index in range(self.first_index, last_index + 1):
+                dist = index * self.step
+                yield self.x + cos_a * dist, self.y + sin_a * dist, dist
+
+    def hit_samples(self, x, y):
+        """返回命中目标的火焰点距离列表，每条射线直接解出命中区间而不逐点测距"""
+        rel_x = x - self.x
+        rel_y = y - self.y
+        radius_sq = self.radius * self.radius
+        hits = []
+        for (cos_a, sin_a), last_index in zip(self.directions, self.last_indices):
+            along = rel_x * cos_a + rel_y * sin_a  # 沿射线方向的投影
+            across = rel_x * sin_a - rel_y * cos_a  # 到射线的垂直距离
+            remaining = radius_sq - across * across
+            if remaining <= 0:
+                continue
+            half_chord = math.sqrt(remaining)
+            # 满足 |along - index*step| < half_chord 的火焰点序号
+            low = max(self.first_index, math.floor((along - half_chord) / self.step) + 1)
+            high = min(last_index, math.ceil((along + half_chord) / self.step) - 1)
+            for index in range(low, high + 1):
+                hits.append(index * self.step)
+        return hits
+
+
+def test_targets(shape, targets):
+    """用一个命中形状一次性检测所有目标，返回[(目标, 命中信息列表)]，只包含被命中的目标"""
+    results = []
+    for target in targets:
+        samples = shape.hit_samples(target.rect.centerx, target.rect.centery)
+        if samples:
+            results.append((target, samples))
+    return results
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+import heapq
+import math
+from constants import *
+
+# 连接类型
+WALK = 0
+FALL = 1
+JUMP = 2
+
+WATER_TILE = 3  # 瓦片编号：水
+
+
+class NavigationGraph:
+    """平台导航图 - 关卡加载时按瓦片网格建立行走/下落/跳跃连接，并维护一个所有敌人共享的追踪流场"""
+
+    def __init__(self, world, jump_strength=ENEMY_JUMP_STRENGTH, jump_reach=ENEMY_JUMP_REACH,
+                 agent_width=ENEMY_NAV_WIDTH, agent_height=ENEMY_NAV_HEIGHT):
+        self.cols = world.grid_cols
+        self.rows = world.grid_rows
+        self.grid = world.tile_grid
+        # 敌人占用的格数：以所在格为中心横向agent_cols列，向上agent_rows行
+        self.agent_cols = max(1, math.ceil(agent_width / TILE_SIZE))
+        self.agent_rows = max(1, math.ceil(agent_height / TILE_SIZE))
+        self.agent_left = (self.agent_cols - 1) // 2  # 所在格左边占用的列数
+        # 由跳跃初速度和重力算出能跳上的最大格数
+        self.jump_rise = int((jump_strength * jump_strength) / (2 * GRAVITY) // TILE_SIZE)
+        self.jump_reach = jump_reach
+        self.jump_drop = jump_reach + self.jump_rise  # 越过缺口时最多下落的格数
+
+        size = self.cols * self.rows
+        self.floor = bytearray(size)  # 本格为空且脚下是地面（小物体可以放置）
+        self.standable = bytearray(size)  # 在地面格上且敌人的身体放得下
+        self.reverse_edges = {}  # 目标格 -> [(出发格, 代价, 连接类型)]
+        self.build()
+
+        # 流场：每个格子朝向目标的下一步方向，以及是否需要起跳
+        self.flow_cost = array('d', [float('inf')]) * size
+        self.flow_direction = array('b', bytes(size))
+        self.flow_jump = array('b', bytes(size))
+        self.target_cell = None
+
+    def is_solid(self, col, row):
+        if col < 0 or col >= self.cols or row < 0 or row >= self.rows:
+            return True
+        return self.grid[row * self.cols + col] != 0
+
+    def is_floor(self, col, row):
+        if col < 0 or col >= self.cols or row < 0 or row >= self.rows:
+            return False
+        return self.floor[row * self.cols + col] == 1
+
+    def is_standable(self, col, row):
+        if col < 0 or col >= self.cols or row < 0 or row >= self.rows:
+            return False
+        return self.standable[row * self.cols + col] == 1
+
+    def is_clear(self, col, row):
+        """敌人脚在该格时身体占用的格子是否都为空"""
+        left = col - self.agent_left
+        for body_row in range(row - self.agent_rows + 1, row + 1):
+            for body_col in range(left, left + self.agent_cols):
+                if self.is_solid(body_col, body_row):
+                    return False
+        return True
+
+    def build(self):
+        # 地面格：本格为空，脚下是实体瓦片且不是水；可站立格还要求放得下敌人的身体
+        for row in range(self.rows - 1):
+            for col in range(self.cols):
+                below = self.grid[(row + 1) * self.cols + col]
+                if self.grid[row * self.cols + col] == 0 and below != 0 and below != WATER_TILE:
+                    self.floor[row * self.cols + col] = 1
+                    if self.is_clear(col, row):
+                        self.standable[row * self.cols + col] = 1
+
+        for row in range(self.rows):
+            for col in range(self.cols):
+                if self.is_standable(col, row):
+                    self.add_links(col, row)
+
+    def add_edge(self, from_col, from_row, to_col, to_row, cost, kind):
+        key = to_row * self.cols + to_col
+        self.reverse_edges.setdefault(key, []).append((from_row * self.cols + from_col, cost, kind))
+
+    def add_links(self, col, row):
+        for step in (-1, 1):
+            next_col = col + step
+            # 行走：旁边同一高度可站立
+            if self.is_standable(next_col, row):
+                self.add_edge(col, row, next_col, row, 1, WALK)
+            elif self.is_clear(next_col, row):
+                # 下落：走出平台边缘后沿该列落到第一个可站立格
+                drop_row = row + 1
+                while drop_row < self.rows and self.is_clear(next_col, drop_row):
+                    if self.is_standable(next_col, drop_row):
+                        self.add_edge(col, row, next_col, drop_row, 1 + (drop_row - row) * 0.5, FALL)
+                        break
+                    drop_row += 1
+
+            # 跳跃：头顶有空间时可以跳到上方，或越过缺口落到对面（可以比起跳点低）
+            if not self.is_clear(col, row - 1):
+                continue
+            for reach in range(1, self.jump_reach + 1):
+                target_col = col + step * reach
+                for rise in range(-self.jump_drop, self.jump_rise + 1):
+                    if reach == 1 and rise <= 0:
+                        continue  # 相邻列的同高度或更低的格子由行走和下落处理
+                    target_row = row - rise
+                    if self.is_standable(target_col, target_row) and self.is_clear(target_col, target_row - 1):
+                        self.add_edge(col, row, target_col, target_row, 2 + reach + abs(rise), JUMP)
+
+    def locate(self, x, bottom):
+        """返回脚下所在的可站立格编号，空中时向下找最近的可站立格，找不到返回None"""
+        col = int(x // TILE_SIZE)
+        row = int((bottom - 1) // TILE_SIZE)
+        if col < 0 or col >= self.cols:
+            return None
+        row = max(0, row)
+        while row < self.rows:
+            if self.is_standable(col, row):
+                return row * self.cols + col
+            if self.is_solid(col, row):
+                return None
+            row += 1
+        return None
+
+    def update_target(self, player):
+        """玩家所在格变化时重新计算流场（从玩家所在格做一次反向最短路）"""
+        target = self.locate(player.rect.centerx, player.rect.bottom)
+        if target is None or target == self.target_cell:
+            return False
+        self.target_cell = target
+
+        cost = self.flow_cost
+        for index in range(len(cost)):
+            cost[index] = float('inf')
+        cost[target] = 0
+        self.flow_direction[target] = 0
+        self.flow_jump[target] = 0
+
+        queue = [(0, target)]
+        while queue:
+            current_cost, cell = heapq.heappop(queue)
+            if current_cost > cost[cell]:
+                continue
+            for source, edge_cost, kind in self.reverse_edges.get(cell, ()):
+                new_cost = current_cost + edge_cost
+                if new_cost < cost[source]:
+                    cost[source] = new_cost
+                    source_col = source % self.cols
+                    target_col = cell % self.cols
+                    self.flow_direction[source] = 1 if target_col > source_col else -1
+                    self.flow_jump[source] = 1 if kind == JUMP else 0
+                    heapq.heappush(queue, (new_cost, source))
+        return True
+
+    def sample(self, x, bottom):
+        """查询某位置朝向玩家的下一步：返回(方向, 是否起跳)，不可达或已在目标格时返回None"""
+        cell = self.locate(x, bottom)
+        if cell is None or cell == self.target_cell or self.flow_cost[cell] == float('inf'):
+            return None
+        return self.flow_direction[cell], self.flow_jump[cell] == 1
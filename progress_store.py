@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sqlite3
+import threading
+from constants import *
+
+
+def default_progress_path():
+    """存档路径：放在用户数据目录下，不受启动时当前目录的影响"""
+    base = os.environ.get('APPDATA') or os.environ.get('XDG_DATA_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.local', 'share')
+    directory = os.path.join(base, PROGRESS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, PROGRESS_FILE)
+
+
+class ProgressStore:
+    """存档 - 收集统计、成就、关卡解锁和设置保存在SQLite文件中，每个键一行JSON；
+    启动时一次查询读完，保存时只登记到待写字典，由后台线程合并后在一个事务中写入
+    （path为None时使用用户数据目录下的存档，测试时可以传入临时文件或":memory:"）"""
+
+    def __init__(self, path=None, interval=PROGRESS_SAVE_INTERVAL):
+        self.path = path if path is not None else default_progress_path()
+        self.interval = interval  # 后台线程合并写入的间隔（秒）
+        self.pending = {}  # 键 -> 已序列化的JSON，同一个键只保留最后一次
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.data = self.load()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS progress (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return connection
+
+    def load(self):
+        """读取全部存档，文件不存在或损坏时返回空存档"""
+        try:
+            connection = self.connect()
+            try:
+                rows = connection.execute("SELECT key, value FROM progress").fetchall()
+            finally:
+                connection.close()
+            return {key: json.loads(value) for key, value in rows}
+        except (sqlite3.Error, ValueError) as e:
+            print(f"读取存档失败: {e}，使用新存档")
+            return {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def save(self, key, value):
+        """登记一个键的新值，主循环只做序列化，不等待磁盘"""
+        self.data[key] = value
+        encoded = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+        with self.lock:
+            self.pending[key] = encoded
+        self.wakeup.set()
+
+    def run(self):
+        connection = self.connect()
+        try:
+            while True:
+                self.wakeup.wait()
+                # 等一小段时间，把这段时间内的保存合并成一次写入（退出时立即写）
+                self.stopping.wait(self.interval)
+                self.wakeup.clear()
+                self.write(connection)
+                if self.stopping.is_set():
+                    break
+        finally:
+            connection.close()
+
+    def write(self, connection):
+        with self.lock:
+            batch = self.pending
+            self.pending = {}
+        if not batch:
+            return
+        try:
+            # 同一批的所有键在一个事务中提交，中途退出不会留下一半的存档
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO progress (key, value) VALUES (?, ?)",
+                                       batch.items())
+        except sqlite3.Error as e:
+            print(f"保存存档失败: {e}")
+
+    def close(self):
+        """退出前写入尚未保存的数据"""
+        if self.stopping.is_set():
+            return
+        self.stopping.set()
+        self.wakeup.set()
+        self.worker.join()
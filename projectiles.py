@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+import pygame
+from constants import *
+from combat import combat_resolver
+
+
+class ProjectileSystem:
+    """投射物系统 - 位置、速度等数据按槽位存放在数组中，槽位用空闲列表复用，不为每个投射物创建对象"""
+
+    def __init__(self, capacity=PROJECTILE_CAPACITY):
+        self.capacity = capacity
+        self.x = array('d', bytes(8 * capacity))
+        self.y = array('d', bytes(8 * capacity))
+        self.vx = array('d', bytes(8 * capacity))
+        self.vy = array('d', bytes(8 * capacity))
+        self.damage = array('d', bytes(8 * capacity))
+        self.forest_damage = array('d', bytes(8 * capacity))
+        self.life = array('i', bytes(4 * capacity))
+        self.radius = array('i', bytes(4 * capacity))
+        self.reach_y = array('i', bytes(4 * capacity))  # 竖直命中容差，0表示按半径做矩形重叠判定
+        self.targets = [None] * capacity  # 每个槽位的作用对象（HazardTarget）
+        self.colors = [None] * capacity
+
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.active_slots = []
+
+    def clear(self):
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        self.active_slots = []
+
+    def active_count(self):
+        return len(self.active_slots)
+
+    def fire(self, x, y, vx, vy, target, damage, life, radius=6, color=ORANGE, forest_damage=0, reach_y=0):
+        """发射一个投射物，返回槽位编号，槽位用完时返回-1"""
+        if not self.free_slots:
+            return -1
+        slot = self.free_slots.pop()
+        self.x[slot] = x
+        self.y[slot] = y
+        self.vx[slot] = vx
+        self.vy[slot] = vy
+        self.damage[slot] = damage
+        self.forest_damage[slot] = forest_damage
+        self.life[slot] = life
+        self.radius[slot] = radius
+        self.reach_y[slot] = reach_y
+        self.targets[slot] = target
+        self.colors[slot] = color
+        self.active_slots.append(slot)
+        return slot
+
+    def sweep_terrain(self, world, slot):
+        """沿本帧的移动路径做网格射线检测，返回是否撞到瓦片（撞到时位置停在撞击点）"""
+        x = self.x[slot]
+        y = self.y[slot]
+        end_x = x + self.vx[slot]
+        end_y = y + self.vy[slot]
+        hit = world.raycast((x, y), (end_x, end_y))
+        if hit is not None:
+            self.x[slot] = hit[0]
+            self.y[slot] = hit[1]
+            return True
+        self.x[slot] = end_x
+        self.y[slot] = end_y
+        return False
+
+    def find_hit(self, slot, player, enemies):
+        """返回被投射物命中的目标，没有命中返回None"""
+        radius = self.radius[slot]
+        reach_y = self.reach_y[slot]
+        y = int(self.y[slot])
+        hit_rect = pygame.Rect(int(self.x[slot]) - radius, y - radius, radius * 2, radius * 2)
+        if self.targets[slot] == HazardTarget.PLAYER:
+            if reach_y > 0:
+                # 竖直方向只要求目标中心在容差内
+                hit = (abs(player.rect.centery - y) < reach_y and
+                       hit_rect.left < player.rect.right and player.rect.left < hit_rect.right)
+            else:
+                hit = hit_rect.colliderect(player.rect)
+            return player if hit else None
+        if reach_y > 0:
+            hit_rect = pygame.Rect(hit_rect.x, y - reach_y, radius * 2, reach_y * 2)
+        candidates = enemies.query_rect(hit_rect)
+        return candidates[0] if candidates else None
+
+    def update(self, world, player, enemies, particles):
+        survivors = []
+        for slot in self.active_slots:
+            self.life[slot] -= 1
+            hit_terrain = self.sweep_terrain(world, slot)
+
+            target = self.find_hit(slot, player, enemies)
+            if target is not None:
+                # 伤害登记到战斗结算，撞击特效立即产生
+                combat_resolver.queue_hit(target, self.damage[slot], hit_cooldown=10,
+                                          forest_damage=self.forest_damage[slot])
+                particles.add_particles(self.x[slot], self.y[slot], self.colors[slot], count=10, life=30)
+                self.free_slots.append(slot)
+            elif hit_terrain or self.life[slot] <= 0:
+                if hit_terrain:
+                    particles.add_particles(self.x[slot], self.y[slot], self.colors[slot], count=5, life=20)
+                self.free_slots.append(slot)
+            else:
+                survivors.append(slot)
+        self.active_slots = survivors
+
+    def draw(self, surface, scroll):
+        for slot in self.active_slots:
+            pygame.draw.circle(surface, self.colors[slot],
+                               (int(self.x[slot] - scroll[0]), int(self.y[slot] - scroll[1])), self.radius[slot])
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from constants import *
+
+
+class SpatialHash:
+    """空间哈希 - 按固定网格登记实体矩形，范围查询只检查附近格子里的实体"""
+
+    def __init__(self, cell_size=SPATIAL_HASH_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (格子x, 格子y) -> 实体列表
+
+    def clear(self):
+        self.cells = {}
+
+    def insert(self, entity, rect=None):
+        """登记实体，实体会出现在其矩形覆盖的所有格子里"""
+        if rect is None:
+            rect = entity.rect
+        size = self.cell_size
+        for cell_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cell_y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                key = (cell_x, cell_y)
+                bucket = self.cells.get(key)
+                if bucket is None:
+                    self.cells[key] = [entity]
+                else:
+                    bucket.append(entity)
+
+    def remove(self, entity, rect=None):
+        """移除实体，rect需要与登记时的矩形一致"""
+        if rect is None:
+            rect = entity.rect
+        size = self.cell_size
+        for cell_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cell_y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                key = (cell_x, cell_y)
+                bucket = self.cells.get(key)
+                if bucket is None:
+                    continue
+                for index, item in enumerate(bucket):
+                    if item is entity:
+                        del bucket[index]
+                        break
+                if not bucket:
+                    del self.cells[key]
+
+    def rebuild(self, entities):
+        """用给定实体的当前位置重建索引（每帧调用一次）"""
+        self.cells = {}
+        for entity in entities:
+            self.insert(entity)
+
+    def _candidates(self, left, top, right, bottom):
+        # 收集区域覆盖的格子中的实体，跨格子的实体只返回一次
+        size = self.cell_size
+        seen = set()
+        candidates = []
+        for cell_x in range(int(left // size), int(right // size) + 1):
+            for cell_y in range(int(top // size), int(bottom // size) + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket is None:
+                    continue
+                for entity in bucket:
+                    entity_id = id(entity)
+                    if entity_id not in seen:
+                        seen.add(entity_id)
+                        candidates.append(entity)
+        return candidates
+
+    def query_rect(self, rect):
+        """返回矩形与给定矩形重叠的实体"""
+        return [entity for entity in self._candidates(rect.left, rect.top, rect.right - 1, rect.bottom - 1)
+                if rect.colliderect(entity.rect)]
+
+    def query_radius(self, x, y, radius):
+        """返回中心点到(x, y)的距离不超过radius的实体"""
+        radius_sq = radius * radius
+        result = []
+        for entity in self._candidates(x - radius, y - radius, x + radius, y + radius):
+            dx = entity.rect.centerx - x
+            dy = entity.rect.centery - y
+            if dx * dx + dy * dy <= radius_sq:
+                result.append(entity)
+        return result
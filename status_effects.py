@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from constants import *
+
+# 状态效果类型
+SLOW = 0  # 减速（敌人）
+SPEED_BOOST = 1  # 加速（玩家）
+STRENGTH_BOOST = 2  # 攻击力提升（玩家）
+
+# 每种效果修改的属性，生效时乘以倍率，到期时再除回去
+EFFECT_ATTRIBUTES = {
+    SLOW: 'speed',
+    SPEED_BOOST: 'speed',
+    STRENGTH_BOOST: 'damage_multiplier',
+}
+
+# 两层时间轮：底层每格1帧，高层每格为底层转一圈的帧数
+WHEEL_BITS = 8
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+OUTER_SIZE = 64
+
+
+class TimerWheel:
+    """分层时间轮 - 到期检查只处理当前格子里的计时器，与未到期的计时器数量无关"""
+
+    def __init__(self):
+        self.frame = 0
+        self.inner = [[] for _ in range(WHEEL_SIZE)]
+        self.outer = [[] for _ in range(OUTER_SIZE)]
+
+    def clear(self):
+        self.inner = [[] for _ in range(WHEEL_SIZE)]
+        self.outer = [[] for _ in range(OUTER_SIZE)]
+
+    def schedule(self, expires_at, entry):
+        """登记在expires_at帧到期的计时器"""
+        delay = expires_at - self.frame
+        if delay < WHEEL_SIZE:
+            # 当前帧的格子已经处理过，已到期的计时器放到下一帧
+            self.inner[max(expires_at, self.frame + 1) & WHEEL_MASK].append((expires_at, entry))
+        elif delay <= WHEEL_SIZE * OUTER_SIZE:
+            self.outer[(expires_at >> WHEEL_BITS) % OUTER_SIZE].append((expires_at, entry))
+        else:
+            # 超出时间轮范围，先放到最远的格子，下放时重新登记
+            far_index = ((self.frame >> WHEEL_BITS) + OUTER_SIZE) % OUTER_SIZE
+            self.outer[far_index].append((expires_at, entry))
+
+    def advance(self):
+        """前进一帧，返回本帧到期的计时器"""
+        self.frame += 1
+        index = self.frame & WHEEL_MASK
+        if index == 0:
+            # 底层转完一圈，把高层当前格子的计时器下放到底层
+            outer_index = (self.frame >> WHEEL_BITS) % OUTER_SIZE
+            bucket = self.outer[outer_index]
+            self.outer[outer_index] = []
+            for expires_at, entry in bucket:
+                if expires_at <= self.frame:
+                    self.inner[index].append((expires_at, entry))
+                else:
+                    self.schedule(expires_at, entry)
+
+        bucket = self.inner[index]
+        if not bucket:
+            return []
+        self.inner[index] = []
+        expired = []
+        for expires_at, entry in bucket:
+            if expires_at <= self.frame:
+                expired.append(entry)
+            else:
+                self.schedule(expires_at, entry)
+        return expired
+
+
+class StatusEffectEngine:
+    """状态效果引擎 - 减速、增益等限时效果按槽位存放在数组中，由时间轮驱动到期，每帧只处理到期的效果"""
+
+    def __init__(self, capacity=STATUS_EFFECT_CAPACITY):
+        self.capacity = capacity
+        self.kinds = array('b', bytes(capacity))
+        self.magnitudes = array('d', bytes(8 * capacity))
+        self.expires = array('l', bytes(array('l').itemsize * capacity))
+        self.generations = array('l', bytes(array('l').itemsize * capacity))  # 续期或取消后旧计时器作废
+        self.entities = [None] * capacity
+
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.slot_by_key = {}  # (实体编号, 效果类型) -> 槽位
+        self.wheel = TimerWheel()
+
+    @property
+    def frame(self):
+        return self.wheel.frame
+
+    def active_count(self):
+        return len(self.slot_by_key)
+
+    def clear(self):
+        """切换关卡时丢弃所有效果（实体会一起被替换，不需要恢复属性）"""
+        self.free_slots = list(range(self.capacity - 1, -1, -1))
+        self.slot_by_key = {}
+        for slot in range(self.capacity):
+            self.entities[slot] = None
+            self.generations[slot] += 1
+        self.wheel.clear()
+
+    def apply(self, entity, kind, magnitude, duration):
+        """施加效果；同类效果已存在时不叠加倍率，只把持续时间延长到较长的一方"""
+        key = (id(entity), kind)
+        expires_at = self.frame + duration
+        slot = self.slot_by_key.get(key)
+        if slot is not None:
+            if expires_at > self.expires[slot]:
+                self.expires[slot] = expires_at
+                self.generations[slot] += 1
+                self.wheel.schedule(expires_at, (slot, self.generations[slot]))
+            return True
+
+        if not self.free_slots:
+            return False
+        slot = self.free_slots.pop()
+        self.kinds[slot] = kind
+        self.magnitudes[slot] = magnitude
+        self.expires[slot] = expires_at
+        self.generations[slot] += 1
+        self.entities[slot] = entity
+        self.slot_by_key[key] = slot
+
+        attribute = EFFECT_ATTRIBUTES[kind]
+        setattr(entity, attribute, getattr(entity, attribute) * magnitude)
+        self.wheel.schedule(expires_at, (slot, self.generations[slot]))
+        return True
+
+    def remaining(self, entity, kind):
+        """效果剩余帧数，没有该效果返回0"""
+        slot = self.slot_by_key.get((id(entity), kind))
+        if slot is None:
+            return 0
+        return self.expires[slot] - self.frame
+
+    def remove(self, slot):
+        # 恢复属性并释放槽位
+        entity = self.entities[slot]
+        kind = self.kinds[slot]
+        attribute = EFFECT_ATTRIBUTES[kind]
+        setattr(entity, attribute, getattr(entity, attribute) / self.magnitudes[slot])
+        del self.slot_by_key[(id(entity), kind)]
+        self.entities[slot] = None
+        self.generations[slot] += 1
+        self.free_slots.append(slot)
+
+    def cancel_entity(self, entity):
+        """立即结束某个实体身上的所有效果（例如回收到对象池时）"""
+        entity_id = id(entity)
+        for kind in EFFECT_ATTRIBUTES:
+            slot = self.slot_by_key.get((entity_id, kind))
+            if slot is not None:
+                self.remove(slot)
+
+    def update(self):
+        """每帧调用一次，结束到期的效果"""
+        for slot, generation in self.wheel.advance():
+            if self.generations[slot] == generation and self.entities[slot] is not None:
+                self.remove(slot)
+
+
+# 全局状态效果引擎，由Game每帧推进
+effect_engine = StatusEffectEngine()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import pygame
+from constants import *
+
+
+class TextCache:
+    """文字渲染缓存 - 按(字体, 文字, 颜色, 抗锯齿)缓存font.render的结果，
+    超出内存预算时淘汰最久未使用的表面；返回的表面是共享的，调用方不能修改"""
+
+    def __init__(self, budget=TEXT_CACHE_BUDGET):
+        self.budget = budget  # 缓存表面像素数据的字节上限
+        self.used = 0
+        self.surfaces = OrderedDict()  # 键 -> 表面，越靠后越近使用
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.surfaces.clear()
+        self.used = 0
+
+    def render(self, font, text, antialias, color):
+        """与font.render参数一致，命中缓存时不重新渲染"""
+        return self.lookup((font, text, tuple(color), antialias),
+                           lambda: font.render(text, antialias, color))
+
+    def lookup(self, key, create):
+        """按键取缓存的表面，没有时调用create()生成并放入缓存"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = create()
+        size = surface_bytes(surface)
+        if size > self.budget:
+            return surface
+        self.surfaces[key] = surface
+        self.used += size
+        while self.used > self.budget:
+            _, evicted = self.surfaces.popitem(last=False)
+            self.used -= surface_bytes(evicted)
+        return surface
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class FontGlyphs:
+    """一种字体的字形图集 - 每个字符用白色栅格化一次，横向排在同一张表面上，用到的颜色各染色一份"""
+
+    def __init__(self, font, antialias):
+        self.font = font
+        self.antialias = antialias
+        self.height = font.get_height()
+        self.areas = {}  # 字符 -> 图集中的区域
+        self.surface = pygame.Surface((0, self.height), pygame.SRCALPHA)
+        self.tinted = {}  # 颜色 -> 染色后的图集
+
+    def add(self, characters):
+        """把新字符加入图集（只在启动或遇到新字符时重建图集表面）"""
+        missing = [ch for ch in dict.fromkeys(characters) if ch not in self.areas]
+        if not missing:
+            return
+        glyphs = [self.font.render(ch, self.antialias, WHITE) for ch in missing]
+        x = self.surface.get_width()
+        width = x + sum(glyph.get_width() for glyph in glyphs)
+        surface = pygame.Surface((width, self.height), pygame.SRCALPHA)
+        # 透明部分也用白色填充，抗锯齿边缘混合时不会变暗
+        surface.fill((255, 255, 255, 0))
+        surface.blit(self.surface, (0, 0))
+        for ch, glyph in zip(missing, glyphs):
+            surface.blit(glyph, (x, 0))
+            self.areas[ch] = pygame.Rect(x, 0, glyph.get_width(), self.height)
+            x += glyph.get_width()
+        self.surface = surface
+        self.tinted = {}
+
+    def strip(self, color):
+        """某种颜色的图集"""
+        color = tuple(color[:3])
+        strip = self.tinted.get(color)
+        if strip is None:
+            strip = self.surface.copy()
+            strip.fill(color + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+            self.tinted[color] = strip
+        return strip
+
+    def render(self, text, color):
+        """用图集中的字形拼出文字"""
+        self.add(text)
+        strip = self.strip(color)
+        blits = []
+        x = 0
+        for ch in text:
+            area = self.areas[ch]
+            blits.append((strip, (x, 0), area, pygame.BLEND_RGBA_ADD))
+            x += area.width
+        # 字形之间不重叠，叠加到全透明表面上等于直接复制
+        result = pygame.Surface((max(1, x), self.height), pygame.SRCALPHA)
+        result.blits(blits, doreturn=False)
+        return result
+
+
+class GlyphAtlas:
+    """字形图集 - 数值经常变化的HUD文字逐字拼接预先栅格化的字形，数字变化时不重新渲染整串文字
+    （不做字距调整，只用于HUD标签）；拼好的表面放进文字缓存，文字不变时不再拼接"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.fonts = {}  # (字体, 抗锯齿) -> FontGlyphs
+
+    def clear(self):
+        self.fonts = {}
+
+    def glyphs_for(self, font, antialias=True):
+        glyphs = self.fonts.get((font, antialias))
+        if glyphs is None:
+            glyphs = self.fonts[(font, antialias)] = FontGlyphs(font, antialias)
+        return glyphs
+
+    def build(self, font, characters, antialias=True):
+        """启动时预先栅格化HUD用到的字符"""
+        self.glyphs_for(font, antialias).add(characters)
+
+    def render(self, font, text, antialias, color):
+        """与font.render参数一致，返回的表面是共享的，调用方不能修改"""
+        # 键的第一项区分拼接结果和font.render的结果（两者字距不同）
+        key = (GlyphAtlas, font, text, tuple(color[:3]), antialias)
+        return self.cache.lookup(key, lambda: self.glyphs_for(font, antialias).render(text, color))
+
+
+# 全局文字缓存，UI、世界和游戏主循环共用
+text_cache = TextCache()
+
+# 全局字形图集，Game启动时为HUD字体预先生成
+glyph_atlas = GlyphAtlas(text_cache)
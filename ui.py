@@ -5,6 +5,7 @@ import pygame
 
 from characters import load_image
 from constants import *
+from text_cache import text_cache, glyph_atlas
 from enum import Enum
 
 # 按钮类
@@ -24,7 +25,7 @@ class Button:
         pygame.draw.rect(surface, (0, 0, 0), self.rect, 2)  # 黑色边框
         
         # 绘制文本
-        text_surf = self.font.render(self.text, True, BLACK)
+        text_surf = text_cache.render(self.font, self.text, True, BLACK)
         text_rect = text_surf.get_rect(center=self.rect.center)
         surface.blit(text_surf, text_rect)
     
@@ -77,13 +78,13 @@ class GameUI:
         pygame.draw.rect(screen, (100, 100, 100), detail_bg, 2)
 
         # 标题
-        title_text = font_medium.render("详细收集统计", True, WHITE)
+        title_text = text_cache.render(font_medium, "详细收集统计", True, WHITE)
         screen.blit(title_text, (detail_x, detail_y))
 
         current_y = detail_y + 30
 
         # 按类型统计
-        type_title = font_small.render("按类型:", True, (200, 200, 200))
+        type_title = text_cache.render(font_small, "按类型:", True, (200, 200, 200))
         screen.blit(type_title, (detail_x, current_y))
         current_y += 20
 
@@ -103,14 +104,14 @@ class GameUI:
             if count > 0:
                 type_name = ctype.value
                 color = type_colors.get(ctype.name, WHITE)
-                type_text = font_small.render(f"  {type_name}: {count}", True, color)
+                type_text = glyph_atlas.render(font_small, f"  {type_name}: {count}", True, color)
                 screen.blit(type_text, (detail_x + 10, current_y))
                 current_y += 18
 
         current_y += 10
 
         # 按稀有度统计
-        rarity_title = font_small.render("按稀有度:", True, (200, 200, 200))
+        rarity_title = text_cache.render(font_small, "按稀有度:", True, (200, 200, 200))
         screen.blit(rarity_title, (detail_x, current_y))
         current_y += 20
 
@@ -134,7 +135,7 @@ class GameUI:
             if count > 0:
                 rarity_name = rarity_names.get(rarity.name, rarity.name)
                 color = rarity_colors.get(rarity.name, WHITE)
-                rarity_text = font_small.render(f"  {rarity_name}: {count}", True, color)
+                rarity_text = glyph_atlas.render(font_small, f"  {rarity_name}: {count}", True, color)
                 screen.blit(rarity_text, (detail_x + 10, current_y))
                 current_y += 18
 
@@ -153,20 +154,20 @@ class GameUI:
         pygame.draw.rect(screen, (100, 100, 100), info_bg, 2)
 
         # 总收集数量
-        total_text = font_small.render(f"总收集: {stats['total_collected']}", True, WHITE)
+        total_text = glyph_atlas.render(font_small, f"总收集: {stats['total_collected']}", True, WHITE)
         screen.blit(total_text, (info_x, info_y))
 
         # 金币数量
-        coins_text = font_small.render(f"金币: {stats['coins']}", True, (255, 215, 0))
+        coins_text = glyph_atlas.render(font_small, f"金币: {stats['coins']}", True, (255, 215, 0))
         screen.blit(coins_text, (info_x, info_y + 20))
 
         # 分数
-        score_text = font_small.render(f"分数: {stats['score']}", True, (0, 255, 0))
+        score_text = glyph_atlas.render(font_small, f"分数: {stats['score']}", True, (0, 255, 0))
         screen.blit(score_text, (info_x, info_y + 40))
 
         # 收集进度
         progress = collection_manager.get_collection_progress()
-        progress_text = font_small.render(f"进度: {progress:.1f}%", True, WHITE)
+        progress_text = glyph_atlas.render(font_small, f"进度: {progress:.1f}%", True, WHITE)
         screen.blit(progress_text, (info_x, info_y + 60))
 
         # 进度条
@@ -190,7 +191,7 @@ class GameUI:
 
         if nearby:
             # 在屏幕左下角显示附近收集品数量
-            indicator_text = font_small.render(f"附近收集品: {len(nearby)}", True, (255, 255, 0))
+            indicator_text = glyph_atlas.render(font_small, f"附近收集品: {len(nearby)}", True, (255, 255, 0))
             screen.blit(indicator_text, (500, SCREEN_HEIGHT - 60))
 
             # 显示最近的收集品类型和稀有度
@@ -204,7 +205,7 @@ class GameUI:
                     1: '普通', 2: '不常见', 3: '稀有', 4: '史诗', 5: '传说'
                 }[closest.rarity.value]
 
-                closest_text = font_small.render(
+                closest_text = glyph_atlas.render(font_small,
                     f"最近: {rarity_name}{type_name}", True, closest.border_color
                 )
                 screen.blit(closest_text, (500, SCREEN_HEIGHT - 40))
@@ -321,7 +322,7 @@ class GameUI:
             pygame.draw.rect(surface, GREEN, 
                            (20, 20, int(200 * (self.player.health/self.player.max_health)), 20))
         
-        health_text = self.font_small.render(f"{int(self.player.health)}/{self.player.max_health}", True, WHITE)
+        health_text = glyph_atlas.render(self.font_small, f"{int(self.player.health)}/{self.player.max_health}", True, WHITE)
         surface.blit(health_text, (25, 20))
         
         # 绘制玩家魔法条
@@ -330,7 +331,7 @@ class GameUI:
             pygame.draw.rect(surface, BLUE, 
                            (20, 45, int(200 * (self.player.magic/self.player.max_magic)), 15))
         
-        magic_text = self.font_small.render(f"{int(self.player.magic)}/{self.player.max_magic}", True, WHITE)
+        magic_text = glyph_atlas.render(self.font_small, f"{int(self.player.magic)}/{self.player.max_magic}", True, WHITE)
         surface.blit(magic_text, (25, 42))
         
         # 绘制森林健康度
@@ -357,11 +358,11 @@ class GameUI:
                 surface.blit(cooldown_surface, cooldown_rect)
             
             # 绘制技能按键
-            key_text = self.font_small.render(icon["key"], True, WHITE)
+            key_text = text_cache.render(self.font_small, icon["key"], True, WHITE)
             surface.blit(key_text, (icon["rect"].x + 5, icon["rect"].y + 5))
             
             # 绘制技能消耗
-            cost_text = self.font_small.render(str(icon["cost"]), True, WHITE)
+            cost_text = text_cache.render(self.font_small, str(icon["cost"]), True, WHITE)
             surface.blit(cost_text, (icon["rect"].x + icon["rect"].width - 20, 
                                    icon["rect"].y + icon["rect"].height - 20))
             
@@ -376,7 +377,7 @@ class GameUI:
     
     def draw_tooltip(self, surface):
         tooltip_text = self.skill_tooltips[self.active_tooltip]
-        tooltip_surface = self.font_small.render(tooltip_text, True, WHITE)
+        tooltip_surface = text_cache.render(self.font_small, tooltip_text, True, WHITE)
         tooltip_rect = tooltip_surface.get_rect()
         tooltip_rect.bottomleft = (self.skill_icons[self.active_tooltip]["rect"].x, 
                                  self.skill_icons[self.active_tooltip]["rect"].y - 5)
@@ -435,12 +436,12 @@ class MainMenuUI:
     
     def draw(self, surface):
         # 绘制标题
-        title_text = self.title_font.render("森林守护者", True, GREEN)
+        title_text = text_cache.render(self.title_font, "森林守护者", True, GREEN)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH//2, 120))
         surface.blit(title_text, title_rect)
         
         # 绘制副标题
-        subtitle_text = self.font_medium.render("守护自然，拯救森林", True, (0, 150, 0))
+        subtitle_text = text_cache.render(self.font_medium, "守护自然，拯救森林", True, (0, 150, 0))
         subtitle_rect = subtitle_text.get_rect(center=(SCREEN_WIDTH//2, 180))
         surface.blit(subtitle_text, subtitle_rect)
         
@@ -449,7 +450,7 @@ class MainMenuUI:
             button.draw(surface)
         
         # 绘制版权信息
-        copyright_text = self.font_small.render("© 2023 森林守护者团队", True, WHITE)
+        copyright_text = text_cache.render(self.font_small, "© 2023 森林守护者团队", True, WHITE)
         copyright_rect = copyright_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT - 30))
         surface.blit(copyright_text, copyright_rect)
 
@@ -508,7 +509,7 @@ class CharacterSelectUI:
 
     def draw(self, surface):
         # 绘制标题
-        title_text = self.font_large.render("选择你的角色", True, WHITE)
+        title_text = text_cache.render(self.font_large, "选择你的角色", True, WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
         surface.blit(title_text, title_rect)
 
@@ -533,8 +534,8 @@ class CharacterSelectUI:
         surface.blit(self.karn_image, karn_image_rect)
 
         # 绘制角色名称
-        lia_name = self.font_medium.render(self.lia_info["name"], True, WHITE)
-        karn_name = self.font_medium.render(self.karn_info["name"], True, WHITE)
+        lia_name = text_cache.render(self.font_medium, self.lia_info["name"], True, WHITE)
+        karn_name = text_cache.render(self.font_medium, self.karn_info["name"], True, WHITE)
 
         surface.blit(lia_name, (self.lia_rect.centerx - lia_name.get_width() // 2,
                                 self.lia_rect.y + self.lia_rect.height + 10))
@@ -543,8 +544,8 @@ class CharacterSelectUI:
                                  self.karn_rect.y + self.karn_rect.height + 10))
 
         # 绘制角色类型
-        lia_type = self.font_small.render(self.lia_info["type"], True, WHITE)
-        karn_type = self.font_small.render(self.karn_info["type"], True, WHITE)
+        lia_type = text_cache.render(self.font_small, self.lia_info["type"], True, WHITE)
+        karn_type = text_cache.render(self.font_small, self.karn_info["type"], True, WHITE)
 
         surface.blit(lia_type, (self.lia_rect.centerx - lia_type.get_width() // 2,
                                 self.lia_rect.y + self.lia_rect.height + 40))
@@ -554,12 +555,12 @@ class CharacterSelectUI:
 
         # 绘制角色技能
         for i, skill in enumerate(self.lia_info["skills"]):
-            skill_text = self.font_small.render(f"· {skill}", True, WHITE)
+            skill_text = text_cache.render(self.font_small, f"· {skill}", True, WHITE)
             surface.blit(skill_text, (self.lia_rect.x + 10,
                                       self.lia_rect.y + self.lia_rect.height + 70 + i * 25))
 
         for i, skill in enumerate(self.karn_info["skills"]):
-            skill_text = self.font_small.render(f"· {skill}", True, WHITE)
+            skill_text = text_cache.render(self.font_small, f"· {skill}", True, WHITE)
             surface.blit(skill_text, (self.karn_rect.x + 10,
                                       self.karn_rect.y + self.karn_rect.height + 70 + i * 25))
 
@@ -625,7 +626,7 @@ class PauseMenuUI:
         pygame.draw.rect(surface, WHITE, self.bg_rect, 2)
 
         # 绘制标题
-        title_text = self.font_large.render("游戏暂停", True, WHITE)
+        title_text = text_cache.render(self.font_large, "游戏暂停", True, WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, self.bg_rect.y + 50))
         surface.blit(title_text, title_rect)
 
@@ -683,12 +684,12 @@ class GameOverUI:
         pygame.draw.rect(surface, (200, 0, 0), self.bg_rect, 2)
 
         # 绘制标题
-        title_text = self.font_large.render("游戏结束", True, (255, 0, 0))
+        title_text = text_cache.render(self.font_large, "游戏结束", True, (255, 0, 0))
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, self.bg_rect.y + 70))
         surface.blit(title_text, title_rect)
 
         # 绘制提示文字
-        hint_text = self.font_medium.render("森林已被摧毁，试着再来一次吧！", True, WHITE)
+        hint_text = text_cache.render(self.font_medium, "森林已被摧毁，试着再来一次吧！", True, WHITE)
         hint_rect = hint_text.get_rect(center=(SCREEN_WIDTH // 2, self.bg_rect.y + 140))
         surface.blit(hint_text, hint_rect)
 
@@ -739,12 +740,12 @@ class VictoryUI:
             pygame.draw.line(surface, (0, color_value, 100), (0, i), (SCREEN_WIDTH, i))
 
         # 绘制标题
-        title_text = self.font_large.render("胜利！", True, GOLD)
+        title_text = text_cache.render(self.font_large, "胜利！", True, GOLD)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
         surface.blit(title_text, title_rect)
 
         # 绘制副标题
-        subtitle_text = self.font_medium.render("你成功守护了森林！", True, WHITE)
+        subtitle_text = text_cache.render(self.font_medium, "你成功守护了森林！", True, WHITE)
         subtitle_rect = subtitle_text.get_rect(center=(SCREEN_WIDTH // 2, 180))
         surface.blit(subtitle_text, subtitle_rect)
 
@@ -758,7 +759,7 @@ class VictoryUI:
         ]
 
         for i, text in enumerate(ending_texts):
-            text_surf = self.font_small.render(text, True, WHITE)
+            text_surf = text_cache.render(self.font_small, text, True, WHITE)
             text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, 250 + i * 40))
             surface.blit(text_surf, text_rect)
 
@@ -810,12 +811,12 @@ class CutsceneUI:
             text_lines = text.split('\n')
 
             for i, line in enumerate(text_lines):
-                text_surf = self.font_medium.render(line, True, WHITE)
+                text_surf = text_cache.render(self.font_medium, line, True, WHITE)
                 text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50 + i * 40))
                 surface.blit(text_surf, text_rect)
 
             # 绘制提示
-            hint_text = self.font_small.render("点击继续...", True, (150, 150, 150))
+            hint_text = text_cache.render(self.font_small, "点击继续...", True, (150, 150, 150))
             hint_rect = hint_text.get_rect(bottomright=(SCREEN_WIDTH - 20, SCREEN_HEIGHT - 20))
             surface.blit(hint_text, hint_rect)
 
@@ -966,21 +967,21 @@ class TutorialUI:
         current_tutorial = self.tutorial_pages[self.current_page]
 
         # 绘制标题
-        title_text = self.font_large.render(current_tutorial["title"], True, (255, 255, 255))
+        title_text = text_cache.render(self.font_large, current_tutorial["title"], True, (255, 255, 255))
         title_x = tutorial_x + (tutorial_width - title_text.get_width()) // 2
         screen.blit(title_text, (title_x, tutorial_y + 30))
 
         # 绘制内容
         content_start_y = tutorial_y + 100
         for i, line in enumerate(current_tutorial["content"]):
-            line_text = self.font_medium.render(line, True, (200, 200, 200))
+            line_text = text_cache.render(self.font_medium, line, True, (200, 200, 200))
             line_x = tutorial_x + 50
             line_y = content_start_y + i * 40
             screen.blit(line_text, (line_x, line_y))
 
         # 绘制页码指示器
         page_info = f"{self.current_page + 1}/{len(self.tutorial_pages)}"
-        page_text = self.font_small.render(page_info, True, (150, 150, 150))
+        page_text = text_cache.render(self.font_small, page_info, True, (150, 150, 150))
         page_x = tutorial_x + tutorial_width - page_text.get_width() - 20
         page_y = tutorial_y + tutorial_height - 40
         screen.blit(page_text, (page_x, page_y))
@@ -1003,7 +1004,7 @@ class TutorialUI:
         else:
             hint_text = "按回车键或点击开始游戏按钮"
 
-        hint_surface = self.font_small.render(hint_text, True, (150, 150, 150))
+        hint_surface = text_cache.render(self.font_small, hint_text, True, (150, 150, 150))
         hint_x = (SCREEN_WIDTH - hint_surface.get_width()) // 2
         hint_y = SCREEN_HEIGHT - 30
         screen.blit(hint_surface, (hint_x, hint_y))
@@ -1217,6 +1218,24 @@ class SettingsUI:
         self.fullscreen_button.text = "关闭"
         self.resolution_button.text = f"{self.resolution_options[self.current_resolution_index][0]}x{self.resolution_options[self.current_resolution_index][1]}"
 
+    def get_settings(self):
+        """存档用的设置"""
+        return {
+            'music_volume': self.music_volume,
+            'sound_volume': self.sound_volume,
+            'resolution_index': self.current_resolution_index,
+            'fullscreen': self.fullscreen
+        }
+
+    def load_settings(self, settings):
+        """从存档恢复设置"""
+        self.music_volume = settings.get('music_volume', self.music_volume)
+        self.sound_volume = settings.get('sound_volume', self.sound_volume)
+        self.current_resolution_index = settings.get('resolution_index', self.current_resolution_index) % len(self.resolution_options)
+        self.fullscreen = settings.get('fullscreen', self.fullscreen)
+        self.fullscreen_button.text = "开启" if self.fullscreen else "关闭"
+        self.resolution_button.text = f"{self.resolution_options[self.current_resolution_index][0]}x{self.resolution_options[self.current_resolution_index][1]}"
+
     def get_current_resolution(self):
         """获取当前选择的分辨率"""
         return self.resolution_options[self.current_resolution_index]
@@ -1224,7 +1243,7 @@ class SettingsUI:
     def draw_slider(self, screen, x, y, value, label):
         """绘制滑块"""
         # 绘制标签
-        label_text = self.option_font.render(label, True, (255, 255, 255))
+        label_text = text_cache.render(self.option_font, label, True, (255, 255, 255))
         screen.blit(label_text, (x - 200, y - 2))
 
         # 绘制滑块轨道
@@ -1247,7 +1266,7 @@ class SettingsUI:
 
         # 绘制音量百分比
         percentage = int(value * 100)
-        percentage_text = self.value_font.render(f"{percentage}%", True, (255, 255, 255))
+        percentage_text = glyph_atlas.render(self.value_font, f"{percentage}%", True, (255, 255, 255))
         screen.blit(percentage_text, (x + self.slider_width + 20, y + 2))
 
     def draw(self, screen):
@@ -1264,12 +1283,12 @@ class SettingsUI:
                          (self.panel_x, self.panel_y, self.panel_width, self.panel_height), 3)
 
         # 绘制标题
-        title_text = self.title_font.render("游戏设置", True, (255, 255, 255))
+        title_text = text_cache.render(self.title_font, "游戏设置", True, (255, 255, 255))
         title_x = self.panel_x + (self.panel_width - title_text.get_width()) // 2
         screen.blit(title_text, (title_x, self.panel_y + 20))
 
         # 绘制音频设置标题
-        audio_title = self.option_font.render("音频设置", True, (200, 200, 200))
+        audio_title = text_cache.render(self.option_font, "音频设置", True, (200, 200, 200))
         screen.blit(audio_title, (self.panel_x + 50, self.panel_y + 80))
 
         # 绘制音乐音量滑块
@@ -1279,15 +1298,15 @@ class SettingsUI:
         self.draw_slider(screen, self.sound_slider_x, self.sound_slider_y, self.sound_volume, "音效音量:")
 
         # 绘制显示设置标题
-        display_title = self.option_font.render("显示设置", True, (200, 200, 200))
+        display_title = text_cache.render(self.option_font, "显示设置", True, (200, 200, 200))
         screen.blit(display_title, (self.panel_x + 50, self.panel_y + 220))
 
         # 绘制分辨率选项
-        resolution_label = self.option_font.render("分辨率:", True, (255, 255, 255))
+        resolution_label = text_cache.render(self.option_font, "分辨率:", True, (255, 255, 255))
         screen.blit(resolution_label, (self.panel_x + 50, self.panel_y + 250))
 
         # 绘制全屏选项
-        fullscreen_label = self.option_font.render("全屏模式:", True, (255, 255, 255))
+        fullscreen_label = text_cache.render(self.option_font, "全屏模式:", True, (255, 255, 255))
         screen.blit(fullscreen_label, (self.panel_x + 50, self.panel_y + 310))
 
         # 绘制所有按钮
@@ -1295,7 +1314,7 @@ class SettingsUI:
             button.draw(screen)
 
         # 绘制提示信息
-        hint_text = self.value_font.render("提示: 点击应用按钮保存设置", True, (180, 180, 180))
+        hint_text = text_cache.render(self.value_font, "提示: 点击应用按钮保存设置", True, (180, 180, 180))
         hint_x = self.panel_x + (self.panel_width - hint_text.get_width()) // 2
         screen.blit(hint_text, (hint_x, self.panel_y + 450))
 
@@ -1309,6 +1328,7 @@ class LevelSelectUI:
         # 创建关卡按钮
         self.level_buttons = []
         self.max_level = 9  # 总关卡数
+        self.unlocked_level = 1  # 已解锁的最高关卡，由存档设置
 
         # 创建关卡按钮网格 (3x3)
         button_width = 100
@@ -1329,6 +1349,8 @@ class LevelSelectUI:
                                   f"关卡 {i + 1}", self.font_medium)
             self.level_buttons.append(level_button)
 
+        self.set_unlocked_level(self.unlocked_level)
+
         # 返回按钮
         self.back_button = Button(50, SCREEN_HEIGHT - 80, 100, 50,
                                   "返回", self.font_medium)
@@ -1345,7 +1367,7 @@ class LevelSelectUI:
         if event.type == pygame.MOUSEBUTTONDOWN:
             # 关卡选择界面
             for i, button in enumerate(self.level_buttons):
-                if button.is_clicked(mouse_pos, event):
+                if i < self.unlocked_level and button.is_clicked(mouse_pos, event):
                     self.selected_level = i + 1
                     return {"level": self.selected_level}
 
@@ -1357,7 +1379,7 @@ class LevelSelectUI:
     def draw(self, screen):
         """绘制界面"""
         # 绘制关卡选择界面
-        title_text = self.font_large.render("选择关卡", True, WHITE)
+        title_text = text_cache.render(self.font_large, "选择关卡", True, WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
         screen.blit(title_text, title_rect)
 
@@ -1369,6 +1391,18 @@ class LevelSelectUI:
         self.back_button.draw(screen)
 
         # 绘制提示文字
-        hint_text = self.font_small.render("点击关卡进入角色选择", True, WHITE)
+        hint_text = text_cache.render(self.font_small, "点击关卡进入角色选择", True, WHITE)
         hint_rect = hint_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
-        screen.blit(hint_text, hint_rect)
\ No newline at end of file
+        screen.blit(hint_text, hint_rect)
+
+    def set_unlocked_level(self, level):
+        """设置已解锁的最高关卡，之后的关卡按钮显示为锁定"""
+        self.unlocked_level = max(1, min(level, self.max_level))
+        for i, button in enumerate(self.level_buttons):
+            if i < self.unlocked_level:
+                button.text = f"关卡 {i + 1}"
+                button.color = (200, 200, 200)
+                button.hover_color = (150, 150, 150)
+            else:
+                button.text = "未解锁"
+                button.color = button.hover_color = (90, 90, 90)
@@ -4,6 +4,10 @@ import pygame
 import random
 import os
 from constants import *
+from hazards import HazardManager
+from projectiles import ProjectileSystem
+from navigation import NavigationGraph
+from text_cache import glyph_atlas
 
 
 class World:
@@ -45,12 +49,15 @@ class World:
 
         # 加载关卡数据
         self.load_level(level)
+        self.navigation = NavigationGraph(self)  # 敌人追踪用的平台导航图
 
         # 收集物列表
         self.collectibles = []
 
         # 环境特效（例如漂浮的叶子、阳光光束等）
         self.environment_effects = []
+        self.hazards = HazardManager()  # 燃烧区、陷阱、污染云等危险区域
+        self.projectiles = ProjectileSystem()  # 火球等投射物
 
         # 初始化环境特效
         self.initialize_environment_effects()
@@ -100,11 +107,18 @@ class World:
         self.world_width = len(data[0]) * TILE_SIZE
         self.world_height = len(data) * TILE_SIZE
 
+        # 瓦片网格，按行存储每格的瓦片编号（0为空），用于按坐标直接查询地形
+        self.grid_cols = len(data[0])
+        self.grid_rows = len(data)
+        self.tile_grid = bytearray(self.grid_cols * self.grid_rows)
+
         # 创建地图
         row_count = 0
         for row in data:
             col_count = 0
             for tile in row:
+                if tile in (1, 2, 3, 4) and col_count < self.grid_cols:
+                    self.tile_grid[row_count * self.grid_cols + col_count] = tile
                 if tile == 1:  # 泥土
                     img = self.dirt_img
                     img_rect = img.get_rect()
@@ -668,7 +682,7 @@ class World:
         pygame.draw.rect(surface, RED, (x, y, bar_width, bar_height))
         pygame.draw.rect(surface, GREEN, (x, y, int(bar_width * (self.forest_health / 100)), bar_height))
 
-        text_surface = font_small.render(f"森林健康: {int(self.forest_health)}%", True, WHITE)
+        text_surface = glyph_atlas.render(font_small, f"森林健康: {int(self.forest_health)}%", True, WHITE)
         surface.blit(text_surface, (x + 10, y + bar_height // 2 - text_surface.get_height() // 2))
 
     def check_collectible_collision(self, player_rect):
@@ -967,21 +981,104 @@ class World:
         return self.level_names.get(self.level, "未知区域")
 
     def is_position_solid(self, x, y):
-        """检查指定位置是否是实体障碍物"""
-        # 转换为瓦片坐标
-        tile_x = int(x / TILE_SIZE)
-        tile_y = int(y / TILE_SIZE)
-
-        # 检查坐标是否在世界范围内
-        if tile_x < 0 or tile_x >= self.world_width // TILE_SIZE or tile_y < 0 or tile_y >= self.world_height // TILE_SIZE:
-            return True  # 世界边界外视为实体
+        """检查指定位置是否是实体障碍物（世界边界外视为实体）"""
+        return self.is_tile_solid(int(x // TILE_SIZE), int(y // TILE_SIZE))
+
+    def is_tile_solid(self, col, row):
+        """检查瓦片格是否有瓦片（世界范围外视为实体，与导航图一致）"""
+        if col < 0 or col >= self.grid_cols or row < 0 or row >= self.grid_rows:
+            return True
+        return self.tile_grid[row * self.grid_cols + col] != 0
+
+    def is_area_solid(self, x, y, width, height):
+        """按瓦片网格检查矩形区域是否与瓦片重叠（只检查覆盖到的格子）"""
+        for row in range(int(y // TILE_SIZE), int((y + height - 1) // TILE_SIZE) + 1):
+            for col in range(int(x // TILE_SIZE), int((x + width - 1) // TILE_SIZE) + 1):
+                if self.is_tile_solid(col, row):
+                    return True
+        return False
 
-        # 检查该位置是否有瓦片
-        for tile in self.tile_list:
-            if tile[1].collidepoint(x, y):
-                return True
+    def resolve_vertical(self, rect, dy, velocity_y):
+        """竖直碰撞：矩形竖直移动dy时按瓦片修正位移，返回(dy, velocity_y)；
+        结果与按行优先顺序逐个检查tile_list相同，但只检查矩形经过的格子
+        （只与真实瓦片碰撞，掉进坑里的敌人仍然会掉出世界并重生）"""
+        first_col = max(0, rect.x // TILE_SIZE)
+        last_col = min(self.grid_cols - 1, (rect.right - 1) // TILE_SIZE)
+        row = max(0, int(rect.y + dy) // TILE_SIZE)
+        while row < self.grid_rows:
+            # 修正后的矩形位置会变化，每一行都按当前位置判断是否还需要继续往下检查
+            top = int(rect.y + dy)
+            if row * TILE_SIZE >= top + rect.height:
+                break
+            for col in range(first_col, last_col + 1):
+                if self.tile_grid[row * self.grid_cols + col] == 0:
+                    continue
+                top = int(rect.y + dy)
+                if top < (row + 1) * TILE_SIZE and top + rect.height > row * TILE_SIZE:
+                    if velocity_y < 0:  # 跳跃时碰到天花板
+                        dy = (row + 1) * TILE_SIZE - rect.top
+                    else:  # 下落时碰到地面
+                        dy = row * TILE_SIZE - rect.bottom
+                    velocity_y = 0
+            row += 1
+        return dy, velocity_y
+
+    def raycast(self, start, end):
+        """沿线段逐格检查瓦片（DDA），返回第一个撞到的瓦片 (撞击点x, 撞击点y, 列, 行)，没有遮挡返回None"""
+        x0, y0 = start
+        x1, y1 = end
+        dx = x1 - x0
+        dy = y1 - y0
+        col = int(x0 // TILE_SIZE)
+        row = int(y0 // TILE_SIZE)
+        end_col = int(x1 // TILE_SIZE)
+        end_row = int(y1 // TILE_SIZE)
+
+        # 沿线段前进到下一条竖直/水平格线所需的参数t，以及每跨一格t的增量
+        step_col = 1 if dx > 0 else -1
+        step_row = 1 if dy > 0 else -1
+        if dx != 0:
+            next_x = (col + 1) * TILE_SIZE if dx > 0 else col * TILE_SIZE
+            t_max_x = (next_x - x0) / dx
+            t_delta_x = TILE_SIZE / abs(dx)
+        else:
+            t_max_x = t_delta_x = float('inf')
+        if dy != 0:
+            next_y = (row + 1) * TILE_SIZE if dy > 0 else row * TILE_SIZE
+            t_max_y = (next_y - y0) / dy
+            t_delta_y = TILE_SIZE / abs(dy)
+        else:
+            t_max_y = t_delta_y = float('inf')
+
+        # 线段经过的格子数是确定的，开销只与穿过的格子数有关
+        t = 0
+        for _ in range(abs(end_col - col) + abs(end_row - row) + 1):
+            if self.is_tile_solid(col, row):
+                return x0 + dx * t, y0 + dy * t, col, row
+            if t_max_x < t_max_y:
+                col += step_col
+                t = t_max_x
+                t_max_x += t_delta_x
+            else:
+                row += step_row
+                t = t_max_y
+                t_max_y += t_delta_y
+        return None
 
-        return False
+    def has_line_of_sight(self, start, end):
+        """两点之间是否没有瓦片遮挡"""
+        return self.raycast(start, end) is None
+
+    def first_solid_along(self, x, y, direction_x, direction_y, max_distance):
+        """从(x, y)沿给定方向探测，返回到第一个瓦片的距离，max_distance内没有瓦片返回None"""
+        length = math.sqrt(direction_x * direction_x + direction_y * direction_y)
+        if length == 0:
+            return 0 if self.is_tile_solid(int(x // TILE_SIZE), int(y // TILE_SIZE)) else None
+        end = (x + direction_x / length * max_distance, y + direction_y / length * max_distance)
+        hit = self.raycast((x, y), end)
+        if hit is None:
+            return None
+        return math.sqrt((hit[0] - x) ** 2 + (hit[1] - y) ** 2)
 
 class EnvironmentEffect:
     def __init__(self, effect_type, x, y):